@@ -0,0 +1,91 @@
+"""
+Peak memory (RSS) of loading a synthetic library of mods and decoding their records,
+with the whole files kept in memory (how Mod.stream used to work) and with memory mapped files.
+Run from the repository root: python -m benchmarks.mod_memory
+Needs the resource module, so it does not run on Windows.
+"""
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mod import FILE_TYPE_MOD, Mod
+
+
+MOD_COUNT = 1000
+RECORDS_PER_MOD = 300
+
+
+def _int(value):
+    return struct.pack("<i", value)
+
+
+def _string(text):
+    data = text.encode('utf-8')
+    return _int(len(data)) + data
+
+
+def synthetic_record(record_id):
+    """Record with a few fields of every type, see mod.ModReader.read_record."""
+    data = _int(1) + _int(3) + _int(record_id) + _string(f"Item {record_id}") + _string(f"{record_id}-base.mod") + _int(0)
+    data += _int(1) + _string("stackable") + b"\x01"
+    data += _int(2) + _string("weight") + struct.pack("<f", 1.5) + _string("value mult") + struct.pack("<f", 2.0)
+    data += _int(1) + _string("cost") + _int(record_id)
+    data += _int(0) + _int(0)   # vec3, vec4
+    data += _int(1) + _string("description") + _string("Lorem ipsum dolor sit amet " * 8)
+    data += _int(1) + _string("icon") + _string("data/icons/item.png")
+    data += _int(1) + _string("materials") + _int(2)
+    data += _string("10-base.mod") + _int(1) + _int(0) + _int(0) + _string("11-base.mod") + _int(2) + _int(0) + _int(0)
+    data += _int(0)   # instances
+    return data
+
+
+def write_library(folder, mod_count, records_per_mod):
+    records = b"".join(synthetic_record(i) for i in range(records_per_mod))
+    for i in range(mod_count):
+        header = _int(FILE_TYPE_MOD) + _int(1) + _string("bench") + _string(f"Mod {i}") + _string("") + _string("")
+        body = _int(records_per_mod) + _int(records_per_mod) + records
+        (Path(folder) / f"Mod{i:05d}.mod").write_bytes(header + body)
+
+
+def run(mode, folder):
+    """Load every mod of the library and decode its records, print the peak RSS in MB."""
+    import resource
+    start = time.perf_counter()
+    mods = []
+    kept = []
+    record_count = 0
+    for path in sorted(Path(folder).glob("*.mod")):
+        mod = Mod(path)
+        if mode == "bytes":
+            kept.append(path.read_bytes())   # the whole file stays alive with the mod
+        record_count += sum(1 for _ in mod.records())
+        mods.append(mod)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(f"{mode:>5}: {len(mods)} mods, {record_count} records in {elapsed:.2f} s, peak RSS {peak_mb:.1f} MB")
+
+
+def main():
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        print("The resource module is not available on this system.")
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        write_library(folder, MOD_COUNT, RECORDS_PER_MOD)
+        size = sum(path.stat().st_size for path in Path(folder).glob("*.mod"))
+        print(f"{MOD_COUNT} mods, {RECORDS_PER_MOD} records each, {size / (1024 * 1024):.1f} MB on disk")
+        # every mode runs in its own process, so the peak RSS of one does not hide the other
+        for mode in ("bytes", "mmap"):
+            subprocess.run([sys.executable, "-m", "benchmarks.mod_memory", mode, folder], check=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        run(sys.argv[1], sys.argv[2])
+    else:
+        main()
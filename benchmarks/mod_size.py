@@ -0,0 +1,72 @@
+"""
+Memory used per Mod instance, when parsed from the .mod file and when restored from the mod cache,
+compared to a mod with plain attributes that keeps its description (how Mod used to store its header).
+Run from the repository root: python -m benchmarks.mod_size
+"""
+import tempfile
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.mod_memory import _int, _string
+from mod import BASE_MODS, FILE_TYPE_MOD, Mod, map_mod_file
+
+
+MOD_COUNT = 1000
+AUTHOR_COUNT = 20
+FRAMEWORK_COUNT = 10
+
+
+def write_mods(folder, mod_count):
+    """Header only mods with a long description, shared authors and shared requirements."""
+    for i in range(mod_count):
+        requires = f"Framework.mod,Lib{i % FRAMEWORK_COUNT}.mod"
+        header = _int(FILE_TYPE_MOD) + _int(1) + _string(f"author{i % AUTHOR_COUNT}")
+        header += _string(f"Description of mod {i}. " * 20) + _string(requires) + _string("Other.mod")
+        (Path(folder) / f"Mod{i:05d}.mod").write_bytes(header + _int(0) + _int(0))
+
+
+class PlainMod:
+    """Header of a mod stored the way Mod did before __slots__: instance dict, lists, datetime, description in memory."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.preview_img_path = self.path.parent / f"_{self.path.stem}.img"
+        if not self.preview_img_path.exists():
+            self.preview_img_path = None
+        self.name = self.path.stem
+        self.date_added = datetime.fromtimestamp(self.path.stat().st_mtime)
+        with map_mod_file(self.path) as reader:
+            reader.read_32int()   # file type
+            self.version = reader.read_32int()
+            self.author = reader.read_string()
+            self.description = reader.read_string()
+            self.requires = [req for req in reader.read_strings() if req not in BASE_MODS]
+            self.references = reader.read_strings()
+            self._header_size = reader.tell()
+        self.steam_workshop_id = None
+        self.web_url = ""
+        self.steam_url = ""
+
+
+def measure(create):
+    """Bytes allocated per mod by create(), which returns a list of mods."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    mods = create()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(mods)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        write_mods(folder, MOD_COUNT)
+        paths = sorted(Path(folder).glob("*.mod"))
+        print(f"plain:  {measure(lambda: [PlainMod(path) for path in paths]):.0f} bytes per mod")
+        print(f"parsed: {measure(lambda: [Mod(path) for path in paths]):.0f} bytes per mod")
+        entries = [(path, Mod(path).to_cache_entry()) for path in paths]
+        print(f"cached: {measure(lambda: [Mod.from_cache_entry(path, entry) for path, entry in entries]):.0f} bytes per mod")
+
+
+if __name__ == "__main__":
+    main()
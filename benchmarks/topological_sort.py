@@ -0,0 +1,48 @@
+"""
+Benchmark of manager.topological_sort on a synthetic modlist.
+Run from the repository root: python -m benchmarks.topological_sort
+"""
+import random
+import time
+
+from manager import topological_sort
+
+
+MOD_COUNT = 5000
+MAX_REQUIREMENTS = 4
+RUNS = 20
+
+
+def synthetic_graph(mod_count, max_requirements, seed=0):
+    """
+    Graph of mods in random load order, each requiring up to max_requirements older mods.
+    A few requirements point to mods that are not in the list.
+    """
+    rnd = random.Random(seed)
+    names = [f"Mod{i:05d}.mod" for i in range(mod_count)]
+    graph = {}
+    for i, name in enumerate(names):
+        requires = [names[rnd.randrange(i)] for _ in range(rnd.randint(0, max_requirements)) if i]
+        if rnd.random() < 0.01:
+            requires.append(f"Missing{i}.mod")
+        graph[name] = requires
+    order = list(graph)
+    rnd.shuffle(order)
+    return {name: graph[name] for name in order}
+
+
+def main():
+    graph = synthetic_graph(MOD_COUNT, MAX_REQUIREMENTS)
+    edges = sum(len(requires) for requires in graph.values())
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result, missing, cycles = topological_sort(graph)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{MOD_COUNT} mods, {edges} requirements, {len(missing)} missing, {len(cycles)} cycles")
+    print(f"best {timings[0] * 1000:.2f} ms, median {timings[len(timings) // 2] * 1000:.2f} ms over {RUNS} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark of vdf.binary_load on a large generated binary VDF (shaped like appinfo.vdf / shortcuts.vdf)
+and on VDFs read one after another from one stream,
+and a differential fuzz test of it against the previous file based decoder (reference_binary_load).
+Run from the repository root: python -m benchmarks.vdf_binary [fuzz iterations]
+"""
+import gc
+import random
+import struct
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+import vdf
+from vdf import (BIN_NONE, BIN_STRING, BIN_INT32, BIN_FLOAT32, BIN_POINTER, BIN_WIDESTRING, BIN_COLOR, BIN_UINT64,
+                 BIN_END, BIN_INT64, BIN_END_ALT, COLOR, POINTER, UINT_64, INT_64, Mapping)
+from vdf.vdict import VDFDict
+
+
+APP_COUNT = 20000
+SHORTCUT_COUNT = 50
+LONG_STRING_LENGTH = 100000
+RUNS = 5
+FUZZ_ITERATIONS = 20000
+
+
+def reference_binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=False):
+    """
+    The chunked binary_load this repository used before the buffer decoder, kept as reference for the fuzz test.
+    """
+    if not hasattr(fp, 'read') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
+        raise TypeError("Expected fp to be a file-like object with tell()/seek() and read() returning bytes")
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
+
+    # helpers
+    int32 = struct.Struct('<i')
+    uint64 = struct.Struct('<Q')
+    int64 = struct.Struct('<q')
+    float32 = struct.Struct('<f')
+
+    def read_string(fp, wide=False):
+        buf, end = b'', -1
+        offset = fp.tell()
+
+        # locate string end
+        while end == -1:
+            chunk = fp.read(64)
+
+            if chunk == b'':
+                raise SyntaxError("Unterminated cstring (offset: %d)" % offset)
+
+            buf += chunk
+            end = buf.find(b'\x00\x00' if wide else b'\x00')
+
+        if wide:
+            end += end % 2
+
+        # rewind fp
+        fp.seek(end - len(buf) + (2 if wide else 1), 1)
+
+        # decode string
+        result = buf[:end]
+
+        if wide:
+            result = result.decode('utf-16')
+        elif bytes is not str:
+            result = result.decode('utf-8', 'replace')
+        else:
+            try:
+                result.decode('ascii')
+            except:
+                result = result.decode('utf-8', 'replace')
+
+        return result
+
+    stack = [mapper()]
+    CURRENT_BIN_END = BIN_END if not alt_format else BIN_END_ALT
+
+    for t in iter(lambda: fp.read(1), b''):
+        if t == CURRENT_BIN_END:
+            if len(stack) > 1:
+                stack.pop()
+                continue
+            break
+
+        key = read_string(fp)
+
+        if t == BIN_NONE:
+            if merge_duplicate_keys and key in stack[-1]:
+                _m = stack[-1][key]
+            else:
+                _m = mapper()
+                stack[-1][key] = _m
+            stack.append(_m)
+        elif t == BIN_STRING:
+            stack[-1][key] = read_string(fp)
+        elif t == BIN_WIDESTRING:
+            stack[-1][key] = read_string(fp, wide=True)
+        elif t in (BIN_INT32, BIN_POINTER, BIN_COLOR):
+            val = int32.unpack(fp.read(int32.size))[0]
+
+            if t == BIN_POINTER:
+                val = POINTER(val)
+            elif t == BIN_COLOR:
+                val = COLOR(val)
+
+            stack[-1][key] = val
+        elif t == BIN_UINT64:
+            stack[-1][key] = UINT_64(uint64.unpack(fp.read(int64.size))[0])
+        elif t == BIN_INT64:
+            stack[-1][key] = INT_64(int64.unpack(fp.read(int64.size))[0])
+        elif t == BIN_FLOAT32:
+            stack[-1][key] = float32.unpack(fp.read(float32.size))[0]
+        else:
+            raise SyntaxError("Unknown data type at offset %d: %s" % (fp.tell() - 1, repr(t)))
+
+    if len(stack) != 1:
+        raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
+    if raise_on_remaining and fp.read(1) != b'':
+        fp.seek(-1, 1)
+        raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (fp.tell() - 1))
+
+    return stack.pop()
+
+
+def synthetic_appinfo(rnd):
+    apps = {}
+    for i in range(APP_COUNT):
+        apps[str(i)] = {
+            "common": {"name": f"Game {i}", "type": "Game", "oslist": "windows,linux", "gameid": UINT_64(rnd.getrandbits(63)),
+                       "metacritic_score": rnd.randrange(100), "review_percentage": rnd.random()},
+            "config": {"installdir": f"Game{i}", "launch": {"0": {"executable": f"game{i}.exe", "arguments": "-nosplash"}}},
+            "depots": {str(i * 10 + d): {"manifests": {"public": UINT_64(rnd.getrandbits(63))}, "maxsize": INT_64(rnd.getrandbits(40))}
+                       for d in range(3)},
+        }
+    return vdf.binary_dumps({"apps": apps})
+
+
+def synthetic_shortcuts(rnd):
+    """Few entries with long strings (e.g. base64 icons), where chunked string reads hurt most."""
+    shortcuts = {str(i): {"appid": rnd.getrandbits(31), "AppName": f"Shortcut {i}", "Exe": f'"C:\\Games\\game{i}.exe"',
+                          "icon": "A" * LONG_STRING_LENGTH, "LaunchOptions": "-windowed", "tags": {"0": "favorite"}}
+                 for i in range(SHORTCUT_COUNT)}
+    return vdf.binary_dumps({"shortcuts": shortcuts})
+
+
+def benchmark(name, data):
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / name
+        path.write_bytes(data)
+        candidates = (("chunked reads", lambda: reference_binary_load(BytesIO(data))),
+                      ("buffer (fp)", lambda: vdf.binary_load(BytesIO(data))),
+                      ("buffer (file)", lambda: load_file(path)),
+                      ("buffer (memoryview)", lambda: vdf.binary_loads(memoryview(data))),
+                      ("buffer (memoryview slice)", lambda: vdf.binary_loads(memoryview(b"\x00" + data)[1:])),
+                      ("buffer (mmap path)", lambda: vdf.binary_load(path)))
+        expected = candidates[0][1]()
+        for label, function in candidates:
+            assert function() == expected, label
+            best = float("inf")
+            gc.disable()    # like timeit, building the dicts otherwise triggers collections that dominate the time
+            try:
+                for _ in range(RUNS):
+                    start = time.perf_counter()
+                    function()
+                    best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+            print(f"{name:14} {len(data) / 1e6:6.1f} MB  {label:25} {best * 1000:8.1f} ms")
+
+
+def load_file(path):
+    with open(path, 'rb') as f:
+        return vdf.binary_load(f)
+
+
+def load_all(fp, count):
+    return [vdf.binary_load(fp) for _ in range(count)]
+
+
+def load_all_file(path, count):
+    with open(path, 'rb') as f:
+        return load_all(f, count)
+
+
+def benchmark_concatenated(count, rnd):
+    """count VDFs stored one after another, each binary_load call should only read its own."""
+    documents = [vdf.binary_dumps({"app": {str(i): {"name": f"App {i}", "appid": i} for i in range(rnd.randint(500, 1500))}})
+                 for _ in range(count)]
+    data = b"".join(documents)
+    expected = [vdf.binary_loads(document) for document in documents]
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "concatenated.vdf"
+        path.write_bytes(data)
+        for label, function in (("fp", lambda: load_all(BytesIO(data), count)),
+                                ("file", lambda: load_all_file(path, count))):
+            assert function() == expected, label
+            start = time.perf_counter()
+            function()
+            print(f"{count} x VDF     {len(data) / 1e6:6.1f} MB  {label:25} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+FUZZ_TYPES = [BIN_NONE, BIN_STRING, BIN_INT32, BIN_FLOAT32, BIN_POINTER, BIN_WIDESTRING, BIN_COLOR, BIN_UINT64, BIN_END,
+              BIN_INT64, BIN_END_ALT, b'\x09', b'\xff']
+FUZZ_PIECES = [b'key\x00', b'\x00', b'\x00\x00', b'a\x00b\x00\x00\x00', b'\xc3\xa9\xff\x00', b'\x01\x02\x03\x04',
+               b'\x01\x02\x03\x04\x05\x06\x07\x08', b'\xff\xfe']
+
+
+def fuzz_document(rnd):
+    if rnd.random() < 0.5:
+        return b''.join(rnd.choice(FUZZ_TYPES if rnd.random() < 0.5 else FUZZ_PIECES) for _ in range(rnd.randint(0, 20)))
+    data = vdf.binary_dumps({"a": {"b": "text", "c": 1, "d": 1.5, "e": UINT_64(2), "f": INT_64(-3), "g": POINTER(4),
+                                   "h": COLOR(5), "i": {}}, "j": "x"}, alt_format=rnd.random() < 0.3)
+    for _ in range(rnd.randint(0, 3)):
+        pos = rnd.randint(0, len(data))
+        if rnd.random() < 0.5:
+            data = data[:pos] + rnd.choice(FUZZ_TYPES + FUZZ_PIECES) + data[pos:]
+        else:
+            data = data[:pos] + data[pos + rnd.randint(1, 3):]
+    return data
+
+
+def outcome(function, data, prefix, fp=None, **kwargs):
+    """Result and final position of function(fp), a BytesIO with prefix + data unless another fp is given."""
+    if fp is None:
+        fp = BytesIO(prefix + data)
+    fp.seek(len(prefix))
+    try:
+        result = function(fp, **kwargs)
+    except Exception as e:
+        return type(e).__name__, e.args, None
+    if isinstance(result, VDFDict):
+        result = list(result.items())
+    return "ok", result, fp.tell()
+
+
+def fuzz(iterations, seed=0):
+    """
+    Compare vdf.binary_load with reference_binary_load on random data, raise AssertionError on the first difference.
+    The documents are read from a BytesIO in chunks of a few bytes, so they often end in the middle of one,
+    and from a file, which is memory mapped.
+    """
+    rnd = random.Random(seed)
+    options = [{}, {"alt_format": True}, {"raise_on_remaining": True}, {"mapper": VDFDict, "merge_duplicate_keys": False}]
+    chunk_size = vdf._READ_CHUNK_SIZE
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "fuzz.vdf"
+        try:
+            for i in range(iterations):
+                data = fuzz_document(rnd)
+                prefix = b'\x00' * rnd.randint(0, 3)
+                kwargs = options[i % len(options)]
+                expected = outcome(reference_binary_load, data, prefix, **kwargs)
+                vdf._READ_CHUNK_SIZE = rnd.randint(1, 8)
+                actual = outcome(vdf.binary_load, data, prefix, **kwargs)
+                assert repr(expected) == repr(actual), f"{data!r} {kwargs}: expected {expected}, got {actual}"
+                path.write_bytes(prefix + data)
+                with open(path, 'rb') as f:
+                    actual = outcome(vdf.binary_load, data, prefix, fp=f, **kwargs)
+                assert repr(expected) == repr(actual), f"file {data!r} {kwargs}: expected {expected}, got {actual}"
+        finally:
+            vdf._READ_CHUNK_SIZE = chunk_size
+    print(f"fuzz: {iterations} documents decoded the same")
+
+
+def main():
+    fuzz(int(sys.argv[1]) if len(sys.argv) > 1 else FUZZ_ITERATIONS)
+    rnd = random.Random(0)
+    benchmark("appinfo.vdf", synthetic_appinfo(rnd))
+    benchmark("shortcuts.vdf", synthetic_shortcuts(rnd))
+    benchmark_concatenated(200, rnd)
+
+
+if __name__ == "__main__":
+    main()
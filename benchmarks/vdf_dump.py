@@ -0,0 +1,204 @@
+"""
+Benchmark of vdf.dumps and vdf.binary_dumps on large generated documents, and a differential test
+of both against the previous generator based serializers (reference_dump_gen, reference_binary_dump_gen).
+Run from the repository root: python -m benchmarks.vdf_dump [test iterations]
+"""
+import gc
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import time
+
+import vdf
+from vdf import (BIN_NONE, BIN_STRING, BIN_INT32, BIN_FLOAT32, BIN_POINTER, BIN_WIDESTRING, BIN_COLOR, BIN_UINT64,
+                 BIN_END, BIN_INT64, BIN_END_ALT, COLOR, POINTER, UINT_64, INT_64, Mapping, string_type, int_type,
+                 _re_escape_match)
+from vdf.vdict import VDFDict
+
+
+ENTRY_COUNT = 20000
+RUNS = 5
+TEST_ITERATIONS = 5000
+
+
+def _reference_escape(text):
+    return re.sub(r"[\n\t\v\b\r\f\a\\\?\"']", _re_escape_match, text)
+
+
+def reference_dump_gen(data, pretty=False, escaped=True, level=0):
+    indent = "\t"
+    line_indent = ""
+
+    if pretty:
+        line_indent = indent * level
+
+    for key, value in data.items():
+        if escaped and isinstance(key, string_type):
+            key = _reference_escape(key)
+
+        if isinstance(value, Mapping):
+            yield '%s"%s"\n%s{\n' % (line_indent, key, line_indent)
+            for chunk in reference_dump_gen(value, pretty, escaped, level+1):
+                yield chunk
+            yield "%s}\n" % line_indent
+        else:
+            if escaped and isinstance(value, string_type):
+                value = _reference_escape(value)
+
+            yield '%s"%s" "%s"\n' % (line_indent, key, value)
+
+
+def reference_binary_dump_gen(obj, level=0, alt_format=False):
+    if level == 0 and len(obj) == 0:
+        return
+
+    int32 = struct.Struct('<i')
+    uint64 = struct.Struct('<Q')
+    int64 = struct.Struct('<q')
+    float32 = struct.Struct('<f')
+
+    for key, value in obj.items():
+        if isinstance(key, string_type):
+            key = key.encode('utf-8')
+        else:
+            raise TypeError("dict keys must be of type str, got %s" % type(key))
+
+        if isinstance(value, Mapping):
+            yield BIN_NONE + key + BIN_NONE
+            for chunk in reference_binary_dump_gen(value, level+1, alt_format=alt_format):
+                yield chunk
+        elif isinstance(value, UINT_64):
+            yield BIN_UINT64 + key + BIN_NONE + uint64.pack(value)
+        elif isinstance(value, INT_64):
+            yield BIN_INT64 + key + BIN_NONE + int64.pack(value)
+        elif isinstance(value, string_type):
+            try:
+                value = value.encode('utf-8') + BIN_NONE
+                yield BIN_STRING
+            except:
+                value = value.encode('utf-16') + BIN_NONE*2
+                yield BIN_WIDESTRING
+            yield key + BIN_NONE + value
+        elif isinstance(value, float):
+            yield BIN_FLOAT32 + key + BIN_NONE + float32.pack(value)
+        elif isinstance(value, (COLOR, POINTER, int, int_type)):
+            if isinstance(value, COLOR):
+                yield BIN_COLOR
+            elif isinstance(value, POINTER):
+                yield BIN_POINTER
+            else:
+                yield BIN_INT32
+            yield key + BIN_NONE
+            yield int32.pack(value)
+        else:
+            raise TypeError("Unsupported type: %s" % type(value))
+
+    yield BIN_END if not alt_format else BIN_END_ALT
+
+
+def synthetic_localconfig(rnd, escapes):
+    """Nested text document, optionally with values that need escaping."""
+    apps = {}
+    for i in range(ENTRY_COUNT):
+        apps[str(i)] = {"LastPlayed": str(rnd.getrandbits(31)), "Playtime": str(rnd.randrange(10000)),
+                        "LaunchOptions": '-dx11 "quoted" \\path' if escapes else "-dx11",
+                        "cloud": {"last_sync_state": "synchronized"}}
+    return {"UserLocalConfigStore": {"Software": {"Valve": {"Steam": {"apps": apps}}}}}
+
+
+def synthetic_appinfo(rnd):
+    return {"apps": {str(i): {"name": f"Game {i}", "gameid": UINT_64(rnd.getrandbits(63)), "score": rnd.randrange(100),
+                              "ratio": rnd.random(), "size": INT_64(rnd.getrandbits(40)), "color": COLOR(rnd.getrandbits(24)),
+                              "depots": {"0": {"manifest": str(rnd.getrandbits(63))}}}
+                     for i in range(ENTRY_COUNT)}}
+
+
+def best_time(function):
+    best = float("inf")
+    gc.disable()    # like timeit
+    try:
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best
+
+
+def benchmark():
+    rnd = random.Random(0)
+    for name, obj in (("localconfig", synthetic_localconfig(rnd, False)),
+                      ("localconfig+esc", synthetic_localconfig(rnd, True))):
+        for pretty in (False, True):
+            old = best_time(lambda: ''.join(reference_dump_gen(obj, pretty, True)))
+            new = best_time(lambda: vdf.dumps(obj, pretty=pretty))
+            print(f"dumps {name:16} pretty={pretty!s:5}  generator {old * 1000:7.1f} ms  buffer {new * 1000:7.1f} ms")
+    obj = synthetic_appinfo(rnd)
+    old = best_time(lambda: b''.join(reference_binary_dump_gen(obj)))
+    new = best_time(lambda: vdf.binary_dumps(obj))
+    print(f"binary_dumps appinfo                generator {old * 1000:7.1f} ms  buffer {new * 1000:7.1f} ms")
+
+    with tempfile.TemporaryFile() as f:
+        fd_time = best_time(lambda: (os.lseek(f.fileno(), 0, os.SEEK_SET), vdf.binary_dump(obj, f.fileno())))
+    print(f"binary_dump to a file descriptor    {fd_time * 1000:7.1f} ms")
+
+
+# characters the escaping and the binary string encoding treat specially
+TEST_CHARACTERS = ['a', 'Z', '0', ' ', '\n', '\t', '\v', '\b', '\r', '\f', '\a', '\\', '?', '"', "'", '{', '}',
+                   '\u00e9', '\u4e2d', '\ud800']
+
+
+def random_object(rnd, depth=0, mapper=dict):
+    obj = mapper()
+    for _ in range(rnd.randint(0, 5)):
+        key = ''.join(rnd.choice(TEST_CHARACTERS) for _ in range(rnd.randint(0, 4)))
+        kind = rnd.randrange(9)
+        if kind == 0 and depth < 3:
+            value = random_object(rnd, depth + 1, mapper)
+        elif kind == 1:
+            value = rnd.randrange(-2 ** 31, 2 ** 31)
+        elif kind == 2:
+            value = rnd.random()
+        elif kind == 3:
+            value = UINT_64(rnd.getrandbits(64))
+        elif kind == 4:
+            value = INT_64(rnd.randrange(-2 ** 63, 2 ** 63))
+        elif kind == 5:
+            value = rnd.choice((COLOR, POINTER))(rnd.randrange(-2 ** 31, 2 ** 31))
+        else:
+            value = ''.join(rnd.choice(TEST_CHARACTERS) for _ in range(rnd.randint(0, 6)))
+        obj[key] = value    # a VDFDict keeps duplicate keys
+    return obj
+
+
+def outcome(function):
+    try:
+        return "ok", function()
+    except Exception as e:
+        return type(e).__name__, str(e)
+
+
+def test(iterations, seed=0):
+    """Compare the serializers with the reference generators, raise AssertionError on the first difference."""
+    rnd = random.Random(seed)
+    for i in range(iterations):
+        obj = random_object(rnd, mapper=VDFDict if i % 3 == 0 else dict)
+        pretty, escaped, alt_format = rnd.random() < 0.5, rnd.random() < 0.8, rnd.random() < 0.3
+        assert outcome(lambda: vdf.dumps(obj, pretty, escaped)) == \
+            outcome(lambda: ''.join(reference_dump_gen(obj, pretty, escaped))), (obj, pretty, escaped)
+        assert outcome(lambda: vdf.binary_dumps(obj, alt_format)) == \
+            outcome(lambda: b''.join(reference_binary_dump_gen(obj, alt_format=alt_format))), (obj, alt_format)
+    print(f"test: {iterations} documents serialized the same")
+
+
+def main():
+    test(int(sys.argv[1]) if len(sys.argv) > 1 else TEST_ITERATIONS)
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
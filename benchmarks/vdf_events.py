@@ -0,0 +1,76 @@
+"""
+Throughput and peak memory of the VDF event iterators compared to building the whole mapping,
+on the generated files of benchmarks.vdf_parse and benchmarks.vdf_binary.
+Run from the repository root: python -m benchmarks.vdf_events
+"""
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import vdf
+from benchmarks.vdf_binary import synthetic_appinfo
+from benchmarks.vdf_parse import localconfig_vdf
+
+
+RUNS = 3
+
+
+def count_events(events):
+    count = 0
+    for _ in events:
+        count += 1
+    return count
+
+
+def measure(function):
+    """Best time over RUNS and peak traced memory of one more run."""
+    best = float("inf")
+    gc.disable()    # like timeit
+    try:
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def report(name, size, candidates):
+    for label, function in candidates:
+        seconds, peak = measure(function)
+        print(f"{name:16} {label:22} {size / 1e6 / seconds:7.1f} MB/s  peak {peak / 1e6:7.1f} MB")
+
+
+def main():
+    rnd = random.Random(0)
+    with tempfile.TemporaryDirectory() as folder:
+        text_path = Path(folder) / "localconfig.vdf"
+        text_path.write_text(localconfig_vdf(rnd), encoding="utf-8")
+
+        def parse():
+            with open(text_path, encoding="utf-8") as f:
+                return vdf.parse(f)
+
+        def iter_events():
+            with open(text_path, encoding="utf-8") as f:
+                return count_events(vdf.iter_events(f))
+
+        report("localconfig.vdf", text_path.stat().st_size, (("parse", parse), ("iter_events", iter_events)))
+
+        data = synthetic_appinfo(rnd)
+        path = Path(folder) / "appinfo.vdf"
+        path.write_bytes(data)
+        report("appinfo.vdf", len(data), (("binary_load", lambda: vdf.binary_load(path)),
+                                          ("binary_iter_events", lambda: count_events(vdf.binary_iter_events(path)))))
+
+
+if __name__ == "__main__":
+    main()
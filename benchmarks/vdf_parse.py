@@ -0,0 +1,234 @@
+"""
+Benchmark of vdf.parse on large generated libraryfolders.vdf, appmanifest and localconfig.vdf files,
+and a differential fuzz test of vdf.parse against the previous regex based parser (reference_parse).
+Run from the repository root: python -m benchmarks.vdf_parse [fuzz iterations]
+"""
+import random
+import re
+import sys
+import time
+from io import StringIO
+
+import vdf
+from vdf import strip_bom, _re_unescape_match
+from vdf.vdict import VDFDict
+
+
+LIBRARY_COUNT = 50
+APPS_PER_LIBRARY = 400
+LOCALCONFIG_APPS = 20000
+LONG_VALUE_LENGTH = 50000
+RUNS = 5
+FUZZ_ITERATIONS = 20000
+
+
+def _reference_unescape(text):
+    return re.sub(r"(\\n|\\t|\\v|\\b|\\r|\\f|\\a|\\\\|\\\?|\\\"|\\')", _re_unescape_match, text)
+
+
+def reference_parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
+    """
+    The regex based vdf.parse this repository used before the tokenizer, kept as reference for the fuzz test.
+    """
+    stack = [mapper()]
+    expect_bracket = False
+
+    re_keyvalue = re.compile(r'^("(?P<qkey>(?:\\.|[^\\"])*)"|(?P<key>#?[a-z0-9\-\_\\\?$%<>]+))'
+                             r'([ \t]*('
+                             r'"(?P<qval>(?:\\.|[^\\"])*)(?P<vq_end>")?'
+                             r'|(?P<val>(?:(?<!/)/(?!/)|[a-z0-9\-\_\\\?\*\.$<> ])+)'
+                             r'|(?P<sblock>{[ \t]*)(?P<eblock>})?'
+                             r'))?',
+                             flags=re.I)
+
+    for lineno, line in enumerate(fp, 1):
+        if lineno == 1:
+            line = strip_bom(line)
+
+        line = line.lstrip()
+
+        # skip empty and comment lines
+        if line == "" or line[0] == '/':
+            continue
+
+        # one level deeper
+        if line[0] == "{":
+            expect_bracket = False
+            continue
+
+        if expect_bracket:
+            raise SyntaxError("vdf.parse: expected openning bracket",
+                              (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 1, line))
+
+        # one level back
+        if line[0] == "}":
+            if len(stack) > 1:
+                stack.pop()
+                continue
+
+            raise SyntaxError("vdf.parse: one too many closing parenthasis",
+                              (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
+
+        # parse keyvalue pairs
+        while True:
+            match = re_keyvalue.match(line)
+
+            if not match:
+                try:
+                    line += next(fp)
+                    continue
+                except StopIteration:
+                    raise SyntaxError("vdf.parse: unexpected EOF (open key quote?)",
+                                      (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
+
+            key = match.group('key') if match.group('qkey') is None else match.group('qkey')
+            val = match.group('qval')
+            if val is None:
+                val = match.group('val')
+                if val is not None:
+                    val = val.rstrip()
+                    if val == "":
+                        val = None
+
+            if escaped:
+                key = _reference_unescape(key)
+
+            # we have a key with value in parenthesis, so we make a new dict obj (level deeper)
+            if val is None:
+                if merge_duplicate_keys and key in stack[-1]:
+                    _m = stack[-1][key]
+                    # we've descended a level deeper, if value is str, we have to overwrite it to mapper
+                    if not isinstance(_m, mapper):
+                        _m = stack[-1][key] = mapper()
+                else:
+                    _m = mapper()
+                    stack[-1][key] = _m
+
+                if match.group('eblock') is None:
+                    # only expect a bracket if it's not already closed or on the same line
+                    stack.append(_m)
+                    if match.group('sblock') is None:
+                        expect_bracket = True
+
+            # we've matched a simple keyvalue pair, map it to the last dict obj in the stack
+            else:
+                # if the value is line consume one more line and try to match again,
+                # until we get the KeyValue pair
+                if match.group('vq_end') is None and match.group('qval') is not None:
+                    try:
+                        line += next(fp)
+                        continue
+                    except StopIteration:
+                        raise SyntaxError("vdf.parse: unexpected EOF (open quote for value?)",
+                                          (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
+
+                stack[-1][key] = _reference_unescape(val) if escaped else val
+
+            # exit the loop
+            break
+
+    if len(stack) != 1:
+        raise SyntaxError("vdf.parse: unclosed parenthasis or quotes (EOF)",
+                           (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
+
+    return stack.pop()
+
+
+def libraryfolders_vdf(rnd):
+    lines = ['"libraryfolders"', '{']
+    for i in range(LIBRARY_COUNT):
+        lines += [f'\t"{i}"', '\t{', f'\t\t"path"\t\t"D:\\\\SteamLibrary{i}"', f'\t\t"label"\t\t""',
+                  f'\t\t"contentid"\t\t"{rnd.getrandbits(63)}"', f'\t\t"totalsize"\t\t"{rnd.getrandbits(40)}"',
+                  '\t\t"apps"', '\t\t{']
+        lines += [f'\t\t\t"{rnd.randrange(10 ** 7)}"\t\t"{rnd.getrandbits(32)}"' for _ in range(APPS_PER_LIBRARY)]
+        lines += ['\t\t}', '\t}']
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def appmanifest_acf(rnd):
+    lines = ['"AppState"', '{', '\t"appid"\t\t"233860"', '\t"name"\t\t"Kenshi"', '\t"installdir"\t\t"Kenshi"',
+             '\t"InstalledDepots"', '\t{']
+    for i in range(2000):
+        lines += [f'\t\t"{233861 + i}"', '\t\t{', f'\t\t\t"manifest"\t\t"{rnd.getrandbits(63)}"',
+                  f'\t\t\t"size"\t\t"{rnd.getrandbits(32)}"', '\t\t}']
+    description = 'line with an escaped \\"quote\\"\n' * (LONG_VALUE_LENGTH // 32)
+    lines += ['\t}', f'\t"description"\t\t"{description}"', '}']
+    return '\n'.join(lines) + '\n'
+
+
+def localconfig_vdf(rnd):
+    lines = ['"UserLocalConfigStore"', '{', '\t"Software"', '\t{', '\t\t"Valve"', '\t\t{', '\t\t\t"Steam"', '\t\t\t{',
+             '\t\t\t\t"apps"', '\t\t\t\t{']
+    for i in range(LOCALCONFIG_APPS):
+        lines += [f'\t\t\t\t\t"{i}"', '\t\t\t\t\t{', f'\t\t\t\t\t\t"LastPlayed"\t\t"{rnd.getrandbits(31)}"',
+                  f'\t\t\t\t\t\t"Playtime"\t\t"{rnd.randrange(10000)}"', '\t\t\t\t\t\t"cloud"', '\t\t\t\t\t\t{',
+                  f'\t\t\t\t\t\t\t"last_sync_state"\t\t"synchronized"', '\t\t\t\t\t\t}', '\t\t\t\t\t}']
+    lines += ['\t\t\t\t}', '\t\t\t}', '\t\t}', '\t}', '}']
+    return '\n'.join(lines) + '\n'
+
+
+def benchmark(name, text):
+    for label, function in (("regex", reference_parse), ("tokenizer", vdf.parse)):
+        best = float("inf")
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            function(StringIO(text))
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:20} {len(text) / 1e6:6.1f} MB  {label:10} {best * 1000:8.1f} ms")
+
+
+# pieces the fuzzer builds documents from, including everything the grammar treats specially
+FUZZ_TOKENS = ['"key"', '"value"', 'key', 'value', '#base', '#', '"', '\\', '\\"', '\\n', '\\\n', '{', '}', '{}', '{ }',
+               '/', '//', '// comment', ' ', '\t', '\n', '\n', '\n', '\r\n', '"a b"', 'a b', 'x.y*z', '$%<>?-_', '@', "'",
+               '\ufeff', '\u0130\u0131\u017f\u212a', '\u00e9', '\x0b', '"multi\nline"', '""']
+
+
+def fuzz_document(rnd):
+    if rnd.random() < 0.5:
+        return ''.join(rnd.choice(FUZZ_TOKENS) for _ in range(rnd.randint(0, 30)))
+    # a valid document with a few mutations
+    text = vdf.dumps({"root": {"a": "1", "b": {"c": "x\\y\"z", "d": ""}, "e": "line\nbreak"}}, pretty=rnd.random() < 0.5)
+    for _ in range(rnd.randint(0, 3)):
+        pos = rnd.randint(0, len(text))
+        if rnd.random() < 0.5:
+            text = text[:pos] + rnd.choice(FUZZ_TOKENS) + text[pos:]
+        else:
+            text = text[:pos] + text[pos + rnd.randint(1, 3):]
+    return text
+
+
+def outcome(function, text, **kwargs):
+    try:
+        return "ok", function(StringIO(text), **kwargs)
+    except Exception as e:
+        return type(e).__name__, e.args
+
+
+def fuzz(iterations, seed=0):
+    """Compare vdf.parse with reference_parse on random documents, raise AssertionError on the first difference."""
+    rnd = random.Random(seed)
+    options = [{}, {"escaped": False}, {"mapper": VDFDict, "merge_duplicate_keys": False}]
+    for i in range(iterations):
+        text = fuzz_document(rnd)
+        kwargs = options[i % len(options)]
+        expected = outcome(reference_parse, text, **kwargs)
+        actual = outcome(vdf.parse, text, **kwargs)
+        if kwargs.get("mapper") is VDFDict:
+            expected = expected if expected[0] != "ok" else ("ok", list(expected[1].items()))
+            actual = actual if actual[0] != "ok" else ("ok", list(actual[1].items()))
+        assert expected == actual, f"{text!r} {kwargs}: expected {expected}, got {actual}"
+    print(f"fuzz: {iterations} documents parsed the same")
+
+
+def main():
+    rnd = random.Random(0)
+    fuzz(int(sys.argv[1]) if len(sys.argv) > 1 else FUZZ_ITERATIONS)
+    for name, text in (("libraryfolders.vdf", libraryfolders_vdf(rnd)), ("appmanifest.acf", appmanifest_acf(rnd)),
+                       ("localconfig.vdf", localconfig_vdf(rnd))):
+        assert reference_parse(StringIO(text)) == vdf.parse(StringIO(text))
+        benchmark(name, text)
+
+
+if __name__ == "__main__":
+    main()
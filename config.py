@@ -19,6 +19,7 @@ CFG_KENSHI_DIR = "KENSHI_DIR"
 CFG_DARK_MODE = "DARK_MODE"
 CFG_WINDOW_WIDTH = "WINDOW_WIDTH"
 CFG_WINDOW_HEIGHT = "WINDOW_HEIGHT"
+CFG_SCAN_WORKERS = "SCAN_WORKERS"
 
 WINDOW_DEFAULT_WIDTH = 1200
 WINDOW_DEFAULT_HEIGHT = 600
@@ -26,11 +27,14 @@ WINDOW_DEFAULT_HEIGHT = 600
 WINDOW_MIN_WIDTH = 800
 WINDOW_MIN_HEIGHT = 400
 
+SCAN_DEFAULT_WORKERS = 8    # also the default of Manager, 1 = serial scan
+
 _default_config = {
     CFG_KENSHI_DIR: "",  # Kenshi directory path
     CFG_DARK_MODE: True,   # Dark mode setting
     CFG_WINDOW_WIDTH: WINDOW_DEFAULT_WIDTH,  # Default window width
     CFG_WINDOW_HEIGHT: WINDOW_DEFAULT_HEIGHT,  # Default window height
+    CFG_SCAN_WORKERS: SCAN_DEFAULT_WORKERS,  # Threads used to scan mod folders, 1 = serial scan
 }
 
 class Config:
@@ -139,6 +143,31 @@ class Config:
         if isinstance(value, int) and value >= WINDOW_MIN_HEIGHT:
             self._config[CFG_WINDOW_HEIGHT] = value
     
+    @property
+    def scan_workers(self):
+        """
+        Get the number of threads used to scan the mod folders.
+        If not set or not a positive integer (e.g. edited by hand), return the default.
+        """
+        value = self._config.get(CFG_SCAN_WORKERS, SCAN_DEFAULT_WORKERS)
+        if not self._is_valid_scan_workers(value):
+            return SCAN_DEFAULT_WORKERS
+        return value
+
+    @scan_workers.setter
+    def scan_workers(self, value):
+        """
+        Set the number of threads used to scan the mod folders.
+        """
+        if not self._is_valid_scan_workers(value):
+            raise ValueError("Scan workers must be a positive integer.")
+        self._config[CFG_SCAN_WORKERS] = value
+        self._save_config()
+
+    @staticmethod
+    def _is_valid_scan_workers(value):
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
     def save_win_size(self):
         """
         Save the current window size to the configuration.
@@ -0,0 +1,139 @@
+from mod import Mod, ModRecord
+
+
+def record_fields(record: ModRecord) -> frozenset[str]:
+    """
+    Names of the fields a record changes.
+    References are named "category/target" and instances "instance/id",
+    the other field types by their key.
+    """
+    fields = set()
+    for values in (record.bools, record.floats, record.ints, record.vec3s, record.vec4s, record.strings, record.filenames):
+        fields.update(values)
+    for category, targets in record.references.items():
+        fields.update(f"{category}/{target}" for target in targets)
+    fields.update(f"instance/{instance_id}" for instance_id in record.instances)
+    return frozenset(fields)
+
+
+class ConflictIndex:
+    """
+    Index of the game records changed by mods: record string id -> mods that change it and which fields.
+    Two mods conflict when they change the same record, the mod loaded later wins.
+    The records of a mod are decoded once and kept as a summary,
+    so adding and removing mods (e.g. toggling them) does not read any file again.
+    """
+    def __init__(self):
+        self._summaries: dict[Mod, dict[str, frozenset[str]]] = {}   # mod -> record string id -> changed fields
+        self._mods_by_record: dict[str, dict[Mod, frozenset[str]]] = {}
+        self._mods: dict[Mod, None] = {}   # indexed mods, used as an insertion ordered set
+        self.errors: dict[Mod, Exception] = {}   # mods whose records could not be decoded
+
+    def __len__(self):
+        return len(self._mods)
+
+    def __contains__(self, mod):
+        return mod in self._mods
+
+    def add_mod(self, mod: Mod):
+        """
+        Add the records of a mod to the index. Does nothing if the mod is already indexed.
+        """
+        if mod in self._mods:
+            return
+        self._mods[mod] = None
+        for string_id, fields in self._summary(mod).items():
+            self._mods_by_record.setdefault(string_id, {})[mod] = fields
+
+    def remove_mod(self, mod: Mod):
+        """
+        Remove the records of a mod from the index. Its decoded records are kept for a later add_mod.
+        """
+        if mod not in self._mods:
+            return
+        del self._mods[mod]
+        for string_id in self._summaries[mod]:
+            mods = self._mods_by_record[string_id]
+            del mods[mod]
+            if not mods:
+                del self._mods_by_record[string_id]
+
+    def forget(self, mod: Mod):
+        """
+        Remove a mod from the index and drop its decoded records (e.g. the mod was deleted or updated).
+        """
+        self.remove_mod(mod)
+        self._summaries.pop(mod, None)
+        self.errors.pop(mod, None)
+
+    def records_of(self, mod: Mod) -> dict[str, frozenset[str]]:
+        """
+        Records changed by an indexed mod.
+        :return: Dictionary of record string id -> names of the changed fields.
+        """
+        return self._summaries[mod] if mod in self._mods else {}
+
+    def mods_changing(self, string_id) -> dict[Mod, frozenset[str]]:
+        """
+        Indexed mods that change a record.
+        :return: Dictionary of Mod -> names of the fields it changes.
+        """
+        return dict(self._mods_by_record.get(string_id, {}))
+
+    def conflicts_for(self, mod: Mod) -> dict[str, dict[Mod, frozenset[str]]]:
+        """
+        Records of a mod that are also changed by other indexed mods.
+        :return: Dictionary of record string id -> {other Mod: fields changed by both mods}.
+                 The set of fields is empty if the mods change different fields of the same record.
+        """
+        conflicts = {}
+        for string_id, fields in self.records_of(mod).items():
+            mods = self._mods_by_record[string_id]
+            if len(mods) > 1:
+                conflicts[string_id] = {other: fields & other_fields for other, other_fields in mods.items() if other is not mod}
+        return conflicts
+
+    def winner(self, string_id, load_order: dict[Mod, int], field=None):
+        """
+        Get the mod whose version of a record is used by the game, that is the one loaded last.
+        :param string_id: String id of the record.
+        :param load_order: Position of every mod in the load order (mods not in it are ignored).
+        :param field: Only consider mods that change this field of the record.
+        :return: Mod instance or None if no mod in the load order changes the record.
+        """
+        winner = None
+        for mod, fields in self._mods_by_record.get(string_id, {}).items():
+            if mod not in load_order or (field is not None and field not in fields):
+                continue
+            if winner is None or load_order[mod] > load_order[winner]:
+                winner = mod
+        return winner
+
+    def conflicting_records(self) -> dict[str, list[Mod]]:
+        """
+        All records changed by more than one indexed mod.
+        :return: Dictionary of record string id -> mods changing it.
+        """
+        return {string_id: list(mods) for string_id, mods in self._mods_by_record.items() if len(mods) > 1}
+
+    def mods_without_conflicts(self) -> list[Mod]:
+        """
+        Indexed mods that do not change any record changed by another indexed mod.
+        """
+        return [mod for mod in self._mods
+                if all(len(self._mods_by_record[string_id]) == 1 for string_id in self._summaries[mod])]
+
+    def _summary(self, mod: Mod):
+        summary = self._summaries.get(mod)
+        if summary is None:
+            summary = {}
+            try:
+                for record in mod.records():
+                    fields = record_fields(record)
+                    previous = summary.get(record.string_id)
+                    summary[record.string_id] = previous | fields if previous else fields
+            except (OSError, ValueError) as e:
+                print(f"Failed to read records of {mod.path}: {e}")
+                self.errors[mod] = e
+            self._summaries[mod] = summary
+        return summary
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import locale
+import os
+import tempfile
+from pathlib import Path
+from stat import S_IMODE
+
+
+# Digest of the content of files written or checked by write_atomic: path -> (st_size, st_mtime_ns, digest).
+# As long as size and modification time match, the file does not have to be read to know its content.
+_known_content: dict[str, tuple[int, int, bytes]] = {}
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _remember(path: Path, digest):
+    try:
+        stat = path.stat()
+    except OSError:
+        _known_content.pop(str(path), None)
+        return
+    _known_content[str(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)  # the umask can only be read by setting it
+    os.umask(umask)
+    return umask
+
+
+# Mode of files created by write_atomic, what open() gives a new file. The umask is read once at import,
+# before other threads write files: while it is being read they would create files with umask 0.
+_NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+
+def _target_mode(path: Path) -> int:
+    """
+    Permission bits the file should keep once replaced: its current ones, or _NEW_FILE_MODE if it does not exist yet.
+    """
+    try:
+        return S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return _NEW_FILE_MODE
+
+
+def is_up_to_date(path, data: bytes, digest=None) -> bool:
+    """
+    Check if a file already has exactly this content.
+    The file is only read if it was changed since write_atomic last wrote or checked it.
+    """
+    path = Path(path)
+    digest = digest or _digest(data)
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    if stat.st_size != len(data):
+        return False
+    known = _known_content.get(str(path))
+    if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+        return known[2] == digest
+    try:
+        up_to_date = path.read_bytes() == data
+    except OSError:
+        return False
+    if up_to_date:
+        _remember(path, digest)
+    return up_to_date
+
+
+def write_atomic(path, data: bytes) -> bool:
+    """
+    Replace the content of a file atomically: the data is written to a temporary file in the same folder,
+    flushed to disk and then renamed over the file. The file keeps its permissions. Readers (e.g. Kenshi) see either the old or the new file, never half of it.
+    Nothing is written if the file already has exactly this content (see is_up_to_date).
+    :param path: Path to the file.
+    :param data: New content.
+    :return: True if the file was written, False if it was already up to date.
+    """
+    path = Path(path)
+    digest = _digest(data)
+    if is_up_to_date(path, data, digest):
+        return False
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, _target_mode(path))   # mkstemp creates the file readable by its owner only
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _remember(path, digest)
+    return True
+
+
+def write_text_atomic(path, text: str, encoding=None) -> bool:
+    """
+    write_atomic for text, encoded the same way open(path, 'w', encoding=encoding) would write it
+    (platform line endings, locale encoding by default).
+    :return: True if the file was written, False if it was already up to date.
+    """
+    if encoding is None:
+        encoding = locale.getpreferredencoding(False)
+    return write_atomic(path, text.replace('\n', os.linesep).encode(encoding))
+
+
+def read_json_cache(path, version: int, key: str) -> dict:
+    """
+    Read the entries of a versioned JSON cache file written by write_json_cache.
+    A missing, corrupted or outdated cache is treated as empty.
+    :param path: Path to the cache file.
+    :param version: Expected version, bumped whenever the shape of the entries changes.
+    :param key: Name the entries are stored under.
+    :return: The entries, empty if the cache cannot be used.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != version:
+        return {}
+    entries = data.get(key, {})
+    return entries if isinstance(entries, dict) else {}
+
+
+def write_json_cache(path, version: int, key: str, entries: dict):
+    """
+    Write the entries of a versioned JSON cache file, see read_json_cache.
+    Every write uses its own temporary file (see write_atomic), so threads can write the same cache at once.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, json.dumps({"version": version, key: entries}), encoding='utf-8')
@@ -6,14 +6,16 @@ import time
 import os
 import subprocess
 import sys
+import threading
 
 from PIL import Image, ImageTk
 
 from mod import Mod
-from manager import Manager, ModlistDiff
+from manager import Manager, ModlistDiff, MOD_MISORDERED, MOD_MISSING_REQUIREMENTS
 from config import APP_NAME, Config, APP_TITLE, WINDOW_MIN_WIDTH, WINDOW_MIN_HEIGHT
 from steam_library import open_steam_with_url, get_workshop_of, KENSHI_WORKSHOP_ID
 from dialog import mod_select_dialog
+from watcher import create_watcher
 
 
 # primary palette colors
@@ -36,6 +38,12 @@ COLOR_SELECT_LIGHT = "#5B71E1"
 COLOR_HOVER_DARK = "#5f5de6"
 COLOR_HOVER_LIGHT = "#0400ff"
 
+# how often the mod folder watcher is asked for changes (ms), it never blocks
+WATCHER_POLL_INTERVAL = 1000
+
+# mods listed in the warning about mods that could not be loaded, the rest is only counted
+MAX_LISTED_SCAN_ERRORS = 20
+
 # button colors
 COLOR_SAVE_BTN_BG_READY = "#427374"
 COLOR_RELOAD_BTN_BG_READY = COLOR_SAVE_BTN_BG_READY # for consistency
@@ -160,10 +168,14 @@ class Gui:
 
         self.create_widgets()
 
+        self.watcher = None
+        self.restart_watcher()
         self.periodic_check_for_mods()
+        self.refresh_save_index()
         self.root.update()
         self.resize_debounce_id = None
         self.root.bind('<Configure>', self.on_resize)
+        self.show_scan_errors()
 
     def create_widgets(self):
         # -------------------
@@ -296,6 +308,8 @@ class Gui:
         self.import_button.pack(fill=X, padx=5, pady=5)
         self.import_save_button = Button(self.buttons_frame, text="Import save", command=self.import_modlist_from_save)
         self.import_save_button.pack(fill=X, padx=5, pady=5)
+        self.profiles_button = Button(self.buttons_frame, text="Profiles", command=self.show_profiles_menu)
+        self.profiles_button.pack(fill=X, padx=5, pady=5)
         
         spacer2 = Frame(self.buttons_frame, height=0)
         spacer2.pack(fill=Y, expand=True)
@@ -422,9 +436,8 @@ class Gui:
                 # Move the mod in the manager's list
                 target_mod_name = event.widget.get(target_index)
                 target_mod = self.manager.mod_by_name(target_mod_name)
-                target_manager_index = self.manager.active_mods.index(target_mod)
-                self.manager.active_mods.remove(self.drag_item)
-                self.manager.active_mods.insert(target_manager_index, self.drag_item)
+                target_manager_index = self.manager.active_index(target_mod)
+                self.manager.move_active_mod(self.drag_item, target_manager_index)
                 self.start_blinking()
                 
                 # Update the list display
@@ -679,9 +692,10 @@ class Gui:
                 continue
             self.active_mods_listbox.insert(END, mod.name)
             
-            if not self.manager.has_all_requirements(mod):
+            status = self.manager.mod_status(mod)
+            if status == MOD_MISSING_REQUIREMENTS:
                 mods_with_missing_reqs.append(i)
-            elif not self.manager.is_in_correct_order(mod):
+            elif status == MOD_MISORDERED:
                 mods_with_misordered_reqs.append(i)
             i += 1
                 
@@ -856,11 +870,14 @@ class Gui:
     def select_kenshi_folder_dialog(self):
         kenshi_dir = select_kenshi_folder()
         if kenshi_dir:
-            self.manager = Manager(kenshi_dir)
+            self.manager = Manager(kenshi_dir, self.manager.mod_cache, self.config.scan_workers)
+            self.restart_watcher()
+            self.refresh_save_index()
             self.update_mod_lists()
             self.clear_info()
             self.stop_blinking()
             self.stop_blinking_reload()
+            self.show_scan_errors()
 
     def clear_info(self):
         """Clear the mod information display"""
@@ -904,6 +921,8 @@ class Gui:
                 context_menu.add_command(label="Open URL in Steam", command=lambda: self.open_steam_url(mod))
             if mod.web_url:
                 context_menu.add_command(label="Copy URL", command=lambda: self.copy_url(mod))
+            context_menu.add_separator()
+            context_menu.add_command(label="Saves Using This Mod", command=lambda: self.show_saves_using(mod))
         
         # Show the context menu
         context_menu.post(event.x_root, event.y_root)
@@ -939,6 +958,23 @@ class Gui:
         """Copy the mod's path to the clipboard"""
         self.copy_to_clipboard(mod.path.parent.as_posix())
 
+    def show_saves_using(self, mod: Mod):
+        """Show the saves that use the mod, from the save index"""
+        try:
+            save_index = self.manager.save_index()
+        except (NotImplementedError, FileNotFoundError):
+            messagebox.showerror("Error", "Cannot find the saves folder.")
+            return
+        if not save_index.refreshed:
+            messagebox.showinfo("Saves", "The saves are still being indexed, try again in a moment.")
+            return
+        saves = self.manager.saves_using(mod)
+        if saves:
+            saves_str = "\n".join(sorted(save.name for save in saves))
+            messagebox.showinfo("Saves", f"{mod.name} is used by these saves:\n{saves_str}")
+        else:
+            messagebox.showinfo("Saves", f"{mod.name} is not used by any save.")
+
     def copy_url(self, mod: Mod):
         """Copy the mod's URL to the clipboard"""
         if mod.web_url:
@@ -963,7 +999,7 @@ class Gui:
     def sort_active_mods(self):
         if self._prev_order is None:
             self._prev_order = self.manager.active_mods.copy()
-        missing_reqs = self.manager.sort_active_mods()
+        missing_reqs, cycles = self.manager.sort_active_mods()
         if missing_reqs:
             right_list = []
             for m in missing_reqs:
@@ -990,6 +1026,12 @@ class Gui:
                         self.toggle_mod(mod_name)
                 self.sort_active_mods()
         else:
+            if cycles:
+                cycles_str = "\n".join(" -> ".join(m.name for m in cycle + cycle[:1]) for cycle in cycles)
+                messagebox.showwarning(
+                    "Circular Requirements",
+                    f"The following mods require each other, their order could not be fully resolved:\n{cycles_str}"
+                )
             # if sorted_mods is not the same as current active mods, start blinking the save button
             if self._prev_order != self.manager.active_mods:
                 self.start_blinking()
@@ -1040,6 +1082,48 @@ class Gui:
 
             self.update_mod_lists()
     
+    def show_profiles_menu(self):
+        """Menu under the Profiles button: save the active mods as a profile or switch to a saved one"""
+        menu = Menu(self.root, tearoff=0)
+        menu.add_command(label="Save as Profile...", command=self.save_profile)
+        profile_names = self.manager.profiles.names()
+        if profile_names:
+            menu.add_separator()
+            for name in profile_names:
+                menu.add_command(label=name, command=lambda name=name: self.switch_profile(name))
+        menu.post(self.profiles_button.winfo_rootx(), self.profiles_button.winfo_rooty() + self.profiles_button.winfo_height())
+
+    def save_profile(self):
+        """Save the active mods as a named profile"""
+        from tkinter import simpledialog
+        name = simpledialog.askstring("Save Profile", "Profile name:", parent=self.root)
+        if not name:
+            return
+        try:
+            if self.manager.profiles.exists(name):
+                if not messagebox.askyesno("Save Profile", f"Profile '{name}' already exists. Do you want to replace it?"):
+                    return
+            self.manager.save_profile(name)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", f"Cannot save the profile:\n{e}")
+
+    def switch_profile(self, name):
+        """Make the mods of a profile the active mods"""
+        try:
+            diff = self.manager.switch_profile(name)
+        except (FileNotFoundError, ValueError) as e:
+            messagebox.showerror("Error", f"Cannot load the profile:\n{e}")
+            return
+        if diff:
+            self.start_blinking()
+        self.update_mod_lists()
+        if diff.missing:
+            missing_mods_str = "\n".join(diff.missing)
+            messagebox.showwarning(
+                "Missing Mods",
+                f"The following mods are missing and were not loaded:\n{missing_mods_str}"
+            )
+
     def import_modlist_from_save(self):
         try:
             save_location = self.manager.saves_location()
@@ -1068,7 +1152,11 @@ class Gui:
                     messagebox.showerror("Error", "No .save files found in the selected folder.")
                     return
                 file_path = save_files[0]
-            mods_ready, missing_mods_names = self.manager.get_mods_from_save(file_path)
+            try:
+                mods_ready, missing_mods_names = self.manager.get_mods_from_save(file_path)
+            except ValueError as e:
+                messagebox.showerror("Error", f"Cannot read the mod list of {file_path.name}:\n{e}")
+                return
             will_load = True
             if missing_mods_names:
                 missing_mods_str = "\n".join(missing_mods_names)
@@ -1079,8 +1167,7 @@ class Gui:
                 )
             if will_load and mods_ready:
                 prev_order = self.manager.active_mods.copy()
-                self.manager.active_mods.clear()
-                self.manager.active_mods.extend(mods_ready)
+                self.manager.set_active_mods(mods_ready)
                 if prev_order != self.manager.active_mods:
                     self.start_blinking()
                 self.update_mod_lists()
@@ -1093,18 +1180,35 @@ class Gui:
     def clear_active_mods(self):
         """Clear the active mods list"""
         if self.manager.active_mods:
-            self.manager.active_mods.clear()
+            self.manager.clear_active_mods()
             self.update_mod_lists()
             self.clear_info()
             self.start_blinking()
 
     def reset_modlist(self):
         """Reset the mod manager to its initial state"""
-        self.manager = Manager(self.manager.kenshi_dir)
+        self.manager = Manager(self.manager.kenshi_dir, self.manager.mod_cache, self.config.scan_workers)
+        self.restart_watcher()
+        self.refresh_save_index()
         self.update_mod_lists()
         self.clear_info()
         self.stop_blinking()
         self.stop_blinking_reload()
+        self.show_scan_errors()
+
+    def show_scan_errors(self):
+        """Warn about the mods that could not be loaded by the last scan, they are not in the mod lists"""
+        errors = self.manager.scan_errors
+        if not errors:
+            return
+        lines = [f"{path.name}: {error}" for path, error in errors[:MAX_LISTED_SCAN_ERRORS]]
+        if len(errors) > MAX_LISTED_SCAN_ERRORS:
+            lines.append(f"... and {len(errors) - MAX_LISTED_SCAN_ERRORS} more")
+        errors_str = "\n".join(lines)
+        messagebox.showwarning(
+            "Broken Mods",
+            f"The following mods could not be read and are not listed:\n{errors_str}"
+        )
     
     def start_blinking(self):
         """Start blinking the save button to indicate unsaved changes"""
@@ -1163,15 +1267,30 @@ class Gui:
                 self.reset_button.config(bg=BG1, fg=FG1)
             self.root.after(1000, self.blink_reload_button)
     
+    def refresh_save_index(self):
+        """Read the mod lists of all saves in a background thread, so the GUI never waits for it"""
+        try:
+            save_index = self.manager.save_index()
+        except (NotImplementedError, FileNotFoundError):
+            return
+        threading.Thread(target=save_index.refresh, daemon=True).start()
+
+    def restart_watcher(self):
+        """Watch the mod folders of the current manager"""
+        if self.watcher:
+            self.watcher.close()
+        self.watcher = create_watcher(self.manager.mod_folders())
+
     def periodic_check_for_mods(self):
-        """Periodically check for new mods and update the lists"""
-        diff: ModlistDiff = self.manager.check_for_new_mods()
-        if diff:
-            self.start_blinking_reload()
-        else:
-            self.stop_blinking_reload()
+        """Periodically ask the watcher for changes in the mod folders, the mods are compared only if something changed"""
+        if self.watcher.poll():
+            diff: ModlistDiff = self.manager.check_for_new_mods()
+            if diff:
+                self.start_blinking_reload()
+            else:
+                self.stop_blinking_reload()
 
-        self.root.after(5000, self.periodic_check_for_mods)
+        self.root.after(WATCHER_POLL_INTERVAL, self.periodic_check_for_mods)
 
     def launch_kenshi(self):
         exe = self.manager.find_kenshi_executable()
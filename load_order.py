@@ -0,0 +1,107 @@
+from bisect import bisect_left
+
+
+# steps of a LoadOrderDiff script
+STEP_REMOVE = "remove"
+STEP_INSERT = "insert"
+
+
+def longest_increasing_subsequence(values) -> list[int]:
+    """
+    Indexes of a longest strictly increasing subsequence of values, in O(n log n) (patience sorting).
+    """
+    tails = []          # tails[k] = index of the smallest tail value of an increasing subsequence of length k + 1
+    tail_values = []    # values[tails[k]], kept separately for bisect
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tail_values, value)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+    result = []
+    i = tails[-1] if tails else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+
+class LoadOrderDiff:
+    """
+    Difference between two load orders (lists of mod file names), e.g. the active mods and a save or a modlist file.
+    The mods kept in place are a longest common subsequence of both orders,
+    found in O(n log n) since a mod is at most once in a load order.
+
+    The script turns the source order into the target order with the fewest steps, in two phases:
+    first ("remove", name, index) for every removed and reordered mod, from the end of the list,
+    then ("insert", name, index) for every added and reordered mod, in target order.
+    Indexes are positions in the list at the time the step is applied.
+    """
+    def __init__(self, source, target, available=None):
+        """
+        :param source: Current load order, mod file names.
+        :param target: Wanted load order, mod file names. Duplicates are ignored, the first occurrence counts.
+        :param available: Names of the mods that can be activated, target mods not in it are reported as missing
+                          and left out. None = all mods are available.
+        """
+        self.source: list[str] = list(dict.fromkeys(source))
+        target = list(dict.fromkeys(target))
+        if available is not None:
+            self.missing: list[str] = [name for name in target if name not in available]
+            target = [name for name in target if name in available]
+        else:
+            self.missing = []
+        self.target: list[str] = target
+
+        target_positions = {name: i for i, name in enumerate(self.target)}
+        source_names = set(self.source)
+        common = [name for name in self.source if name in target_positions]
+        kept = set(common[i] for i in longest_increasing_subsequence([target_positions[name] for name in common]))
+
+        self.added: list[str] = [name for name in self.target if name not in source_names]
+        self.removed: list[str] = [name for name in self.source if name not in target_positions]
+        self.reordered: list[str] = [name for name in self.target if name in source_names and name not in kept]
+        self.unchanged: list[str] = [name for name in self.target if name in kept]
+
+        self.script: list[tuple[str, str, int]] = []
+        for index in range(len(self.source) - 1, -1, -1):
+            if self.source[index] not in kept:
+                self.script.append((STEP_REMOVE, self.source[index], index))
+        for index, name in enumerate(self.target):
+            if name not in kept:
+                self.script.append((STEP_INSERT, name, index))
+
+    def __bool__(self):
+        return bool(self.script)
+
+    def __repr__(self):
+        return (f"LoadOrderDiff(added={len(self.added)}, removed={len(self.removed)}, "
+                f"reordered={len(self.reordered)}, missing={len(self.missing)})")
+
+    def apply(self, load_order) -> list:
+        """
+        Run the script on a copy of a list of mod file names.
+        :param load_order: List equal to the source order.
+        :return: The target order.
+        """
+        result = list(load_order)
+        for step, name, index in self.script:
+            if step == STEP_REMOVE:
+                del result[index]
+            else:
+                result.insert(index, name)
+        return result
+
+
+def read_modlist(file_path) -> list[str]:
+    """
+    Read a modlist file (one mod file name per line, see Manager.export_modlist).
+    """
+    with open(file_path, 'r', encoding="utf-8") as f:
+        return [line.strip() for line in f.read().splitlines() if line.strip()]
@@ -2,7 +2,7 @@ import os
 from pathlib import Path
 from tkinter import Tk, filedialog, messagebox
 
-from steam_library import get_steam_install_path, get_steam_library_folders, get_installed_steam_games, KENSHI_WORKSHOP_ID, KENSHI_STEAM_NAME
+from steam_library import get_installed_game, KENSHI_WORKSHOP_ID
 from config import Config
 from manager import Manager
 from gui import start_gui, select_kenshi_folder
@@ -12,24 +12,8 @@ def get_steam_kenshi_folder():
     """
     Find the Kenshi installation folder by checking common locations.
     """
-    result = None
-
-    steam_path = get_steam_install_path()
-    
-    if not steam_path:
-        print("Steam installation path could not be determined.")
-        return result
-    
-    library_folders = get_steam_library_folders(steam_path)
-    
-    steam_games = get_installed_steam_games(library_folders)
-
-    for game in steam_games:
-        if str(game.appid) == KENSHI_WORKSHOP_ID:
-            result = game.install_dir
-            break
-    
-    return result
+    game = get_installed_game(KENSHI_WORKSHOP_ID)
+    return game.install_dir if game else None
 
 
 def get_kenshi_folder_from_config():
@@ -69,7 +53,7 @@ def main():
         # if user didnt select folder, just exit
         return
     
-    manager = Manager(kenshi_folder)
+    manager = Manager(kenshi_folder, scan_workers=Config().scan_workers)
 
     start_gui(manager)
 
@@ -1,33 +1,66 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from fnmatch import fnmatch
+import os
 import platform
 
 from steam_library import get_workshop_of, KENSHI_WORKSHOP_ID
 from mod import Mod, BASE_MODS
+from mod_cache import ModCache
+from conflicts import ConflictIndex
+from save_file import VANILLA_MOD_TYPE, read_save_mods
+from save_index import SaveIndex
+from load_order import LoadOrderDiff, STEP_REMOVE, read_modlist
+from profiles import ProfileStore
+from file_utils import write_text_atomic
+from config import SCAN_DEFAULT_WORKERS
 
 
-def topological_sort(graph: dict[str, list[str]]) -> list[str]:
-    result = []
-    visited = set()
-    missing_items = []
+# load order status of an active mod, see Manager.mod_status
+MOD_OK = 0
+MOD_MISORDERED = 1              # all required mods are active, but some are loaded after the mod
+MOD_MISSING_REQUIREMENTS = 2    # some required mods are not active
 
-    def visit(node):
-        if node in visited:
-            return
-        visited.add(node)
 
-        x = graph.get(node, [])
-        if not x:
-            if node not in graph:
-                missing_items.append(node)
-        else:
-            for neighbor in x:
-                visit(neighbor)
-        result.append(node)
+def topological_sort(graph: dict) -> tuple[list, list, list[list]]:
+    """
+    Stable topological sort in O(V+E), without recursion.
+    Nodes are visited in the order of the graph, a node is only moved when something before it requires it,
+    so the existing order is kept as much as possible.
+    :param graph: {node: [nodes it requires]}. Required nodes that are not keys of the graph count as missing.
+    :return: A tuple [0]=sorted nodes of the graph; [1]=missing nodes; [2]=cycles, each one a list of its members
+    """
+    result = []
+    missing_items = {}  # used as an ordered set
+    cycles = []
+    on_stack = {}  # node -> its position in the stack
+    done = set()
 
-    for node in graph.keys():
-        visit(node)
+    for root in graph:
+        if root in done:
+            continue
+        stack = [(root, iter(graph[root]))]
+        on_stack[root] = 0
+        while stack:
+            node, requirements = stack[-1]
+            for requirement in requirements:
+                if requirement not in graph:
+                    missing_items[requirement] = None
+                elif requirement in on_stack:
+                    # everything on the stack from the requirement up to this node requires each other
+                    cycles.append([n for n, _ in stack[on_stack[requirement]:]])
+                elif requirement not in done:
+                    on_stack[requirement] = len(stack)
+                    stack.append((requirement, iter(graph[requirement])))
+                    break
+            else:
+                stack.pop()
+                del on_stack[node]
+                done.add(node)
+                result.append(node)
 
-    return result, missing_items
+    return result, list(missing_items), cycles
 
 
 def find_files(root, pattern, level=0):
@@ -38,38 +71,111 @@ def find_files(root, pattern, level=0):
     :param level: The current recursion level (0 = check only root then stop recursion).
     :return: A list of matching file paths.
     """
-    root = Path(root)
-    matches = []
-    for item in root.iterdir():
-        if not item.is_dir():
-            if item.match(pattern) and (item.name not in [path.name for path in matches]):
-                matches.append(item)
-        else:
-            if level:
-                new_matches = find_files(item, pattern, level - 1)
-                for match in new_matches:
-                    if match.match(pattern) and (match.name not in [path.name for path in matches]):
-                        matches.append(match)
-    return matches
+    return [Path(entry.path) for entry in iter_files(root, pattern, level)]
+
+
+def iter_files(root, pattern, level=0, seen_names=None):
+    """
+    Walk a directory with os.scandir and yield matching files as they are found.
+    Only the first file with a given name is yielded (depth first, in directory order),
+    later files with the same name are skipped.
+    :param root: The root directory to start searching from.
+    :param pattern: The file pattern to match (e.g., '*.mod').
+    :param level: The current recursion level (0 = check only root then stop recursion).
+    :param seen_names: Set of file names already yielded, shared by the recursive calls.
+    :return: Generator of os.DirEntry of the matching files.
+    """
+    if seen_names is None:
+        seen_names = set()
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if level:
+                    yield from iter_files(entry.path, pattern, level - 1, seen_names)
+            elif entry.name not in seen_names and fnmatch(entry.name, pattern):
+                seen_names.add(entry.name)
+                yield entry
 
 
 class ModlistDiff:
-    def __init__(self, added, removed):
+    def __init__(self, added, removed, modified=None):
         self.added = added
         self.removed = removed
+        self.modified = modified if modified is not None else set()
     
     def __bool__(self):
-        return bool(self.added or self.removed)
+        return bool(self.added or self.removed or self.modified)
+
+
+class ModSnapshot:
+    """
+    Size and modification time of every mod file in the given folders, taken with os.scandir.
+    No file is opened, so taking and comparing snapshots is cheap even with thousands of mods.
+    Covers the same files as find_files(folder, pattern, 1).
+    """
+    def __init__(self, folders, pattern="*.mod"):
+        self.files: dict[Path, tuple[int, int]] = {}  # path -> (st_size, st_mtime_ns)
+        for folder in folders:
+            for entry in self._scandir(folder):
+                if entry.is_dir():
+                    for sub_entry in self._scandir(entry.path):
+                        self._add(sub_entry, pattern)
+                else:
+                    self._add(entry, pattern)
+
+    def changes(self, newer: "ModSnapshot"):
+        """
+        Compare with a newer snapshot.
+        :return: A tuple of paths [0]=added; [1]=removed; [2]=modified (size or modification time changed)
+        """
+        added = newer.files.keys() - self.files.keys()
+        removed = self.files.keys() - newer.files.keys()
+        modified = {path for path, stat in newer.files.items() if path in self.files and self.files[path] != stat}
+        return added, removed, modified
+
+    def diff(self, newer: "ModSnapshot") -> ModlistDiff:
+        """
+        Compare with a newer snapshot.
+        :return: ModlistDiff with file names of added, removed and modified mods.
+        """
+        added, removed, modified = self.changes(newer)
+        return ModlistDiff(
+            added={path.name for path in added},
+            removed={path.name for path in removed},
+            modified={path.name for path in modified},
+        )
+
+    def _add(self, entry, pattern):
+        if entry.is_dir() or not fnmatch(entry.name, pattern):
+            return
+        try:
+            stat = entry.stat()
+        except OSError:
+            return
+        self.files[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _scandir(path):
+        try:
+            with os.scandir(path) as entries:
+                return list(entries)
+        except OSError:
+            return []
     
 
 class Manager:
     """
     Mod manager for Kenshi.
     """
-    def __init__(self, kenshi_dir):
+    def __init__(self, kenshi_dir, mod_cache: ModCache = None, scan_workers=SCAN_DEFAULT_WORKERS, profiles: ProfileStore = None):
         if not kenshi_dir:
             raise ValueError("Kenshi directory must be set.")
         self.kenshi_dir = Path(kenshi_dir)
+        self.mod_cache = mod_cache if mod_cache is not None else ModCache()
+        self.profiles = profiles if profiles is not None else ProfileStore()
+        self.scan_workers = scan_workers
+        self.scan_errors: list[tuple[Path, Exception]] = []  # mods that failed to load during the last scan
+        self.mods_snapshot = ModSnapshot([])   # state of the mod files as of the last scan
         
         self.active_mods_file = Path(kenshi_dir) / "data" / "mods.cfg"
 
@@ -77,14 +183,31 @@ class Manager:
         if self.active_mods_file.exists():
             with open(self.active_mods_file, 'r') as f:
                 active_mod_names = f.read().splitlines()
-                
-        self.all_mods = self.find_all_mods()
 
-        self.active_mods: list[Mod] = []
-        for mod_name in active_mod_names:
-            mod = next((m for m in self.all_mods if m.path.name == mod_name), None)
-            if mod:
-                self.active_mods.append(mod)
+        # Lookup indexes, kept in sync with all_mods and active_mods.
+        # all_mods/active_mods must only be changed through the setters and the methods of Manager.
+        self._all_mods: list[Mod] = []
+        self._mods_by_filename: dict[str, Mod] = {}
+        self._mods_by_stem: dict[str, Mod] = {}
+        self._mods_by_workshop_id: dict[str, Mod] = {}
+        # Reverse dependency graph: mod file name -> mods that require/reference it.
+        # The forward edges are the requires/references lists of the mods themselves.
+        # Inner dicts are used as insertion ordered sets.
+        self._required_by: dict[str, dict[Mod, None]] = {}
+        self._referenced_by: dict[str, dict[Mod, None]] = {}
+        # Load order state: position of every active mod, active mod by file name and status of every active mod.
+        # Kept up to date incrementally, see _activate, _deactivate and move_active_mod.
+        self._active_mods: list[Mod] = []
+        self._active_positions: dict[Mod, int] = {}
+        self._active_by_name: dict[str, Mod] = {}
+        self._active_status: dict[Mod, int] = {}
+        # Records changed by the active mods, built on the first call of conflict_index.
+        self._conflict_index: ConflictIndex | None = None
+        # Mod lists of all saves, created on the first call of save_index.
+        self._save_index: SaveIndex | None = None
+
+        self.all_mods = self.find_all_mods()
+        self.active_mods = [self._mods_by_filename[name] for name in active_mod_names if name in self._mods_by_filename]
         
         self.save_all_mods()    # Tell Kenshi about all mods, so it does not automaticall enable them
 
@@ -93,38 +216,229 @@ class Manager:
     
     def __repr__(self):
         return f"Manager('{self.kenshi_dir}', {len(self.all_mods)}, {len(self.active_mods)})"
+
+    @property
+    def all_mods(self) -> list[Mod]:
+        """
+        All found mods. Do not modify the list directly, assign a new one instead.
+        """
+        return self._all_mods
+
+    @all_mods.setter
+    def all_mods(self, mods):
+        self._all_mods = list(mods)
+        self._mods_by_filename.clear()
+        self._mods_by_stem.clear()
+        self._mods_by_workshop_id.clear()
+        self._required_by.clear()
+        self._referenced_by.clear()
+        for mod in self._all_mods:
+            self._index_mod(mod)
+
+    def _index_mod(self, mod: Mod, position: dict[Mod, int] = None):
+        """
+        Add a mod to the lookup indexes and the dependency graph.
+        :param position: Position of every mod in all_mods, needed when mods are not indexed in scan order (see rescan).
+        """
+        # first found wins, same as the order of the scan
+        if position is None:
+            self._mods_by_filename.setdefault(mod.path.name, mod)
+            self._mods_by_stem.setdefault(mod.name, mod)
+            if mod.steam_workshop_id:
+                self._mods_by_workshop_id.setdefault(mod.steam_workshop_id, mod)
+        else:
+            for index, key in ((self._mods_by_filename, mod.path.name),
+                               (self._mods_by_stem, mod.name),
+                               (self._mods_by_workshop_id, mod.steam_workshop_id)):
+                if not key:
+                    continue
+                current = index.get(key)
+                if current is None or position[mod] < position.get(current, len(position)):
+                    index[key] = mod
+        for req in mod.requires:
+            self._required_by.setdefault(req, {})[mod] = None
+        for ref in mod.references:
+            self._referenced_by.setdefault(ref, {})[mod] = None
+
+    def _unindex_mod(self, mod: Mod):
+        """
+        Remove a mod from the lookup indexes and the dependency graph.
+        Must be called after the mod was removed from all_mods.
+        """
+        for index, key_of in ((self._mods_by_filename, lambda m: m.path.name),
+                              (self._mods_by_stem, lambda m: m.name),
+                              (self._mods_by_workshop_id, lambda m: m.steam_workshop_id)):
+            key = key_of(mod)
+            if key and index.get(key) is mod:
+                del index[key]
+                # another mod with the same key (e.g. local copy of a workshop mod) takes over
+                replacement = next((m for m in self._all_mods if key_of(m) == key), None)
+                if replacement:
+                    index[key] = replacement
+        if self._conflict_index is not None:
+            self._conflict_index.forget(mod)
+        for graph, names in ((self._required_by, mod.requires), (self._referenced_by, mod.references)):
+            for name in names:
+                dependents = graph.get(name)
+                if dependents is not None:
+                    dependents.pop(mod, None)
+                    if not dependents:
+                        del graph[name]
+
+    @property
+    def active_mods(self) -> list[Mod]:
+        """
+        Active mods in load order.
+        Do not modify the list directly, use set_active_mods, toggle_mod, move_active_mod, etc.
+        """
+        return self._active_mods
+
+    @active_mods.setter
+    def active_mods(self, mods):
+        self.set_active_mods(mods)
+
+    def set_active_mods(self, mods):
+        """
+        Replace the active mods with the given mods, in the given order.
+        Duplicates are ignored, only the first occurrence is kept.
+        """
+        previous = self._active_positions
+        self._active_mods = []
+        self._active_positions = {}
+        self._active_by_name = {}
+        for mod in mods:
+            if mod not in self._active_positions:
+                self._active_positions[mod] = len(self._active_mods)
+                self._active_mods.append(mod)
+                self._active_by_name.setdefault(mod.path.name, mod)
+        self._active_status = {mod: self._compute_status(mod) for mod in self._active_mods}
+        if self._conflict_index is not None:
+            for mod in previous.keys() - self._active_positions.keys():
+                self._conflict_index.remove_mod(mod)
+            for mod in self._active_mods:
+                self._conflict_index.add_mod(mod)
+
+    def clear_active_mods(self):
+        """
+        Deactivate all mods.
+        """
+        self.set_active_mods([])
+
+    def move_active_mod(self, mod: Mod, index):
+        """
+        Move an active mod to a new position in the load order.
+        :param mod: Active Mod instance.
+        :param index: New position of the mod.
+        """
+        if not self.is_active(mod):
+            raise ValueError("Mod must be in the active_mods list to move it.")
+        old_index = self._active_positions[mod]
+        self._active_mods.pop(old_index)
+        index = max(0, min(index, len(self._active_mods)))
+        self._active_mods.insert(index, mod)
+        self._update_positions(min(old_index, index), max(old_index, index) + 1)
+        # only the order between this mod and the mods it skipped over changed
+        self._revalidate(mod)
+
+    def is_active(self, mod: Mod):
+        """
+        Check if the mod instance is in the active_mods list.
+        """
+        return mod in self._active_positions
+
+    def active_index(self, mod: Mod):
+        """
+        Get the position of an active mod in the load order.
+        """
+        if not self.is_active(mod):
+            raise ValueError("Mod must be in the active_mods list to get its position.")
+        return self._active_positions[mod]
+
+    def mod_status(self, mod: Mod):
+        """
+        Get the load order status of an active mod: MOD_OK, MOD_MISORDERED or MOD_MISSING_REQUIREMENTS.
+        The status of all active mods is kept up to date, so this is a dictionary lookup.
+        """
+        if not self.is_active(mod):
+            raise ValueError("Mod must be in the active_mods list to check its status.")
+        return self._active_status[mod]
+
+    def _activate(self, mod: Mod):
+        """Append a mod to the end of the load order."""
+        self._active_positions[mod] = len(self._active_mods)
+        self._active_mods.append(mod)
+        self._active_by_name.setdefault(mod.path.name, mod)
+        self._revalidate(mod)
+        if self._conflict_index is not None:
+            self._conflict_index.add_mod(mod)
+
+    def _deactivate(self, mod: Mod):
+        """Remove a mod from the load order."""
+        index = self._active_positions.pop(mod)
+        self._active_mods.pop(index)
+        self._update_positions(index, len(self._active_mods))
+        del self._active_status[mod]
+        if self._active_by_name.get(mod.path.name) is mod:
+            del self._active_by_name[mod.path.name]
+            # another active mod with the same file name takes over
+            replacement = next((m for m in self._active_mods if m.path.name == mod.path.name), None)
+            if replacement:
+                self._active_by_name[mod.path.name] = replacement
+        self._revalidate(mod, include_self=False)
+        if self._conflict_index is not None:
+            self._conflict_index.remove_mod(mod)
+
+    def _update_positions(self, start, end):
+        """Refresh the stored positions of active mods in the range [start, end)."""
+        for i in range(start, end):
+            self._active_positions[self._active_mods[i]] = i
+
+    def _revalidate(self, mod: Mod, include_self=True):
+        """
+        Recompute the status of a mod whose position changed and of the active mods that require it.
+        Nothing else can be affected by adding, removing or moving a single mod.
+        """
+        if include_self:
+            self._active_status[mod] = self._compute_status(mod)
+        for dependent in self._required_by.get(mod.path.name, ()):
+            if dependent in self._active_positions:
+                self._active_status[dependent] = self._compute_status(dependent)
+
+    def _compute_status(self, mod: Mod):
+        position = self._active_positions[mod]
+        status = MOD_OK
+        for dependency in mod.requires:
+            required_mod = self._active_by_name.get(dependency)
+            if required_mod is None:
+                return MOD_MISSING_REQUIREMENTS
+            if self._active_positions[required_mod] > position:
+                status = MOD_MISORDERED
+        return status
     
     def sorted_active_mods(self):
         """
         Topological sort of the active mods.
         It will try to keep the same order.
         If a mod has list of required mods, they will be placed before the mod itself.
+        :return: A tuple [0]=sorted list of Mod instances; [1]=names of required mods that are not active;
+                 [2]=lists of mods that require each other in a cycle
         """
-        def to_graph(mods):
-            graph = {mod.path.name: [] for mod in mods}
-            for mod in mods:
-                graph[mod.path.name] = [req for req in mod.requires if req not in BASE_MODS]
-            return graph
-        
-        graph = to_graph(self.active_mods)
-
-        missing_mods = []
-        sorted_mods, missing_mods = topological_sort(graph)
-        sorted_active_mods = []
-        for mod_name in sorted_mods:
-            mod = next((m for m in self.active_mods if m.path.name == mod_name), None)
-            if mod:
-                sorted_active_mods.append(mod)
-        return sorted_active_mods, missing_mods
+        # requirements that are not active stay as names, the sort reports them as missing
+        graph = {
+            mod: [self._active_by_name.get(req, req) for req in mod.requires if req not in BASE_MODS]
+            for mod in self.active_mods
+        }
+        return topological_sort(graph)
     
     def sort_active_mods(self):
         """
         Sort the active mods in a topological order based on their dependencies.
         This will modify the active_mods list.
+        :return: A tuple [0]=names of required mods that are not active; [1]=lists of mods that require each other in a cycle
         """
-        sorted_mods, missing_mods = self.sorted_active_mods()
+        sorted_mods, missing_mods, cycles = self.sorted_active_mods()
         self.active_mods = sorted_mods
-        return missing_mods
+        return missing_mods, cycles
 
     def has_all_requirements(self, mod: Mod):
         """
@@ -135,9 +449,10 @@ class Manager:
         if not isinstance(mod, Mod):
             raise ValueError("mod must be an instance of Mod.")
         
-        all_mods = [m.path.name for m in self.active_mods]
+        if self.is_active(mod):
+            return self._active_status[mod] != MOD_MISSING_REQUIREMENTS
         for dependency in mod.requires:
-            if dependency not in all_mods:
+            if dependency not in self._active_by_name:
                 return False
         return True
     
@@ -151,38 +466,36 @@ class Manager:
         if not isinstance(mod, Mod):
             raise ValueError("mod must be an instance of Mod.")
     
-        if mod not in self.active_mods:
+        if not self.is_active(mod):
             raise ValueError("Mod must be in the active_mods list to check its order.")
         
-        if not self.has_all_requirements(mod):
-            return False
-        
-        all_mods = [m.path.name for m in self.active_mods]
-        for dependency in mod.requires:
-            # Check if the dependency appears before the mod in the active_mods list
-            if all_mods.index(dependency) > all_mods.index(mod.path.name):
-                return False
-        return True
+        return self._active_status[mod] == MOD_OK
     
     def save_active_mods(self):
         """
         Save the active mods to the active_mods_file.
+        The file is replaced atomically and not touched at all if it is already up to date.
+        :return: True if the file was written.
         """
-        with open(self.active_mods_file, 'w') as f:
-            f.write('\n'.join([m.path.name for m in self.active_mods]))
-            f.write('\n')  # This is what the official manager does
+        content = '\n'.join([m.path.name for m in self.active_mods])
+        content += '\n'  # This is what the official manager does
+        return write_text_atomic(self.active_mods_file, content)
     
     def save_all_mods(self):
+        """
+        Save the names of all mods to data/__mods.list, same as save_active_mods.
+        :return: True if the file was written.
+        """
         all_mods_file = self.kenshi_dir / "data" / "__mods.list"
-        with open(all_mods_file, 'w') as f:
-            f.write('\n'.join([m.path.stem for m in self.all_mods]))
-            f.write('\n')
+        content = '\n'.join([m.path.stem for m in self.all_mods])
+        content += '\n'
+        return write_text_atomic(all_mods_file, content)
 
     def inactive_mods(self):
         """
         Get a list of inactive mods (mods that are not in the active_mods list).
         """
-        return [mod for mod in self.all_mods if mod not in self.active_mods]
+        return [mod for mod in self.all_mods if mod not in self._active_positions]
     
     def mod_by_name(self, name):
         """
@@ -192,7 +505,21 @@ class Manager:
         """
         if not name.endswith(".mod"):
             name += ".mod"
-        return next((m for m in self.all_mods if m.path.name == name), None)
+        return self._mods_by_filename.get(name)
+
+    def mod_by_stem(self, stem):
+        """
+        Get a mod by its name exactly as given (the file name without the .mod extension).
+        :return: Mod instance or None if not found.
+        """
+        return self._mods_by_stem.get(stem)
+
+    def mod_by_workshop_id(self, workshop_id):
+        """
+        Get a mod by its Steam Workshop ID.
+        :return: Mod instance or None if not found.
+        """
+        return self._mods_by_workshop_id.get(str(workshop_id))
     
     def mods_by_names(self, names):
         """
@@ -221,13 +548,13 @@ class Manager:
                 mod += ".mod"
             mod = Path(mod)
         if isinstance(mod, Path):
-            mod = next((m for m in self.all_mods if m.path.name == mod.name), None)
+            mod = self._mods_by_filename.get(mod.name)
         if not mod or not isinstance(mod, Mod):
             raise ValueError("Mod must be a Mod instance or a valid mod name.")
-        if mod in self.active_mods:
-            self.active_mods.remove(mod)
+        if self.is_active(mod):
+            self._deactivate(mod)
         else:
-            self.active_mods.append(mod)
+            self._activate(mod)
 
     def saves_location(self):
         """
@@ -255,77 +582,73 @@ class Manager:
             else:
                 raise NotImplementedError("User save location for non-Windows platforms is not implemented yet.")
             
+    def save_index(self) -> SaveIndex:
+        """
+        Index of the mod lists of all saves, created on the first call.
+        It is empty until its refresh() (which reads the saves) has finished, refresh() can run in a background thread.
+        Raises the same exceptions as saves_location.
+        """
+        if self._save_index is None:
+            self._save_index = SaveIndex(self.saves_location(), workers=self.scan_workers)
+        return self._save_index
+
+    def saves_using(self, mod: Mod):
+        """
+        Indexed saves that use the given mod.
+        :return: List of save_index.SaveInfo.
+        """
+        return self.save_index().saves_using(mod.name)
+
+    def compatible_saves(self):
+        """
+        Indexed saves that use only mods that are currently active.
+        :return: List of save_index.SaveInfo.
+        """
+        return self.save_index().compatible_saves(mod.name for mod in self._active_mods)
+
     def get_mods_from_save(self, save_path):
         """
         Get a list of mods used in a save file.
         A save file might contain a mod that is currently not downloaded.
         :param save_path: Path to the save file.
         :return: A tuple [0]=list of Mod instances used in correct order; [1]=list of mod names not downloaded
+        :raises ValueError: If the mod list of the save cannot be decoded.
         """
         save_path = Path(save_path)
         if not save_path.exists():
             raise FileNotFoundError(f"Save file not found: {save_path}")
         
+        if self._save_index is not None:
+            save_info = self._save_index.get(save_path)
+            if save_info.error:
+                raise ValueError(save_info.error)
+            mod_list = save_info.mods
+        else:
+            mod_list = read_save_mods(save_path)
+
         mods = []
         not_found = []
-        with open(save_path, 'rb') as f:
-            content = f.read()
-
-            # TODO: implement proper decoder of save files
-            # because the following algorithm is so unreliable
-            start = "mods"
-            expected_amount = 9999999
-            realistic_amount = 2000 # I highly doubt there will be more than 2000 mods in a save file
-            start_index = content.find(start.encode())
-            while True:
-                # there is many ".mods" before the actual mods list starts
-                if content[start_index-1] == ord('.'):
-                    start_index = content.find(start.encode(), start_index + 1)
-                else:
-                    # it is possible to find "mods" without a "." infront but it might be a false positive if the next 4bytes are huge number
-                    expected_amount = int.from_bytes(content[start_index+len(start):start_index+len(start)+4], 'little')
-                    if expected_amount < realistic_amount:
-                        break
-
-            start_index += len(start) + 4
-            mod_names = []
-            mod_types = []
-            vanilla_type = 4294967295
-            while len(mod_names) < expected_amount:
-                next_name_len = int.from_bytes(content[start_index:start_index+4], 'little')
-                start_index += 4
-                mod_name = content[start_index:start_index+next_name_len].decode('utf-8', errors='ignore')
-                mod_names.append(mod_name)
-                start_index += next_name_len
-                mod_type = int.from_bytes(content[start_index:start_index+4], 'little')
-                mod_types.append(mod_type)
-                start_index += 4
-                # skip next 8 bytes, I think they might be used as part of length of the mod name?
-                start_index += 8
-                if mod_type != vanilla_type:
-                    # if mod type is not vanilla, it is a mod
-                    mod = next((m for m in self.all_mods if m.name == mod_name), None)
-                    if mod:
-                        mods.append(mod)
-                    else:
-                        not_found.append(mod_name)       
-                
+        for mod_name, mod_type in mod_list:
+            if mod_type == VANILLA_MOD_TYPE:
+                continue
+            mod = self.mod_by_stem(mod_name)
+            if mod:
+                mods.append(mod)
+            else:
+                not_found.append(mod_name)
         return (mods, not_found)
     
     def import_modlist(self, file_path):
         missing = []
         if Path(file_path).exists():
-            with open(file_path, 'r', encoding="utf-8") as f:
-                mod_names = f.read().splitlines()
-                self.active_mods.clear()
-                for mod_name in mod_names:
-                    mod_name = mod_name.strip()
-                    mod = next((m for m in self.all_mods if m.path.name == mod_name), None)
-                    if mod:
-                        self.active_mods.append(mod)
-                    else:
-                        if mod_name:
-                            missing.append(mod_name)
+            mods = []
+            for mod_name in read_modlist(file_path):
+                mod = self._mods_by_filename.get(mod_name)
+                if mod:
+                    mods.append(mod)
+                else:
+                    missing.append(mod_name)
+            self.set_active_mods(mods)
         else:
             raise FileNotFoundError(f"Modlist file not found: {file_path}")
         return missing
@@ -334,34 +657,172 @@ class Manager:
         """
         Export the current active mods to a file.
         :param file_path: Path to the file where the mod list will be saved.
+        :return: True if the file was written, False if it already contained this mod list.
         """
-        with open(file_path, 'w', encoding="utf-8") as f:
-            for mod in self.active_mods:
-                f.write(mod.path.name + '\n')
+        content = ''.join(mod.path.name + '\n' for mod in self.active_mods)
+        return write_text_atomic(file_path, content, encoding="utf-8")
     
-    def find_all_mods(self):
-        all_mods = []
+    def diff_modlists(self, source, target) -> LoadOrderDiff:
+        """
+        Compare two load orders, e.g. the active mods, a modlist file (load_order.read_modlist) or a save.
+        :param source: List of Mod instances or mod names (with or without .mod).
+        :param target: List of Mod instances or mod names (with or without .mod).
+        :return: LoadOrderDiff from source to target, target mods that are not downloaded are reported as missing.
+        """
+        return LoadOrderDiff([self._mod_filename(mod) for mod in source],
+                             [self._mod_filename(mod) for mod in target],
+                             available=self._mods_by_filename)
+
+    def diff_active_mods(self, target) -> LoadOrderDiff:
+        """
+        Compare the active mods with another load order, see diff_modlists.
+        """
+        return self.diff_modlists(self._active_mods, target)
+
+    def apply_load_order_diff(self, diff: LoadOrderDiff):
+        """
+        Change the active mods step by step following the script of a diff made by diff_active_mods.
+        Only the mods in the script are touched, the rest keeps its place.
+        """
+        if [mod.path.name for mod in self._active_mods] != diff.source:
+            raise ValueError("The diff does not start from the current active mods.")
+        for step, name, index in diff.script:
+            if step == STEP_REMOVE:
+                self._deactivate(self._active_mods[index])
+            else:
+                mod = self._mods_by_filename[name]
+                self._activate(mod)
+                self.move_active_mod(mod, index)
+
+    def save_profile(self, name):
+        """
+        Save the active mods as a named profile.
+        :return: True if the profile file was written, False if it was already the same.
+        """
+        return self.profiles.save(name, [mod.path.name for mod in self._active_mods])
+
+    def switch_profile(self, name) -> LoadOrderDiff:
+        """
+        Make the mods of a profile the active mods, in the profile order.
+        Works with the already loaded mods only, the mod folders are not scanned.
+        :return: LoadOrderDiff from the previous active mods to the profile, its `missing` lists mods that are not downloaded.
+        """
+        diff = self.diff_active_mods(self.profiles.load(name))
+        if diff:
+            self.set_active_mods(self._mods_by_filename[mod_name] for mod_name in diff.target)
+        return diff
+
+    def mod_folders(self):
+        """
+        Get the existing folders mods are loaded from: Kenshi mods folder and the Steam Workshop folder.
+        """
+        folders = []
         kenshi_mods_folder = Path(self.kenshi_dir) / "mods"
         kenshi_workshop_folder = get_workshop_of(KENSHI_WORKSHOP_ID)
         if kenshi_mods_folder.exists():
-            all_mods.extend(find_files(kenshi_mods_folder, "*.mod", 1))
+            folders.append(kenshi_mods_folder)
         if kenshi_workshop_folder:
             kenshi_workshop_folder = Path(kenshi_workshop_folder)
             if kenshi_workshop_folder.exists():
-                all_mods.extend(find_files(kenshi_workshop_folder, "*.mod", 1))
-        all_mods = [Mod(mod) for mod in all_mods if mod.is_file()]
+                folders.append(kenshi_workshop_folder)
+        return folders
+
+    def find_all_mods(self):
+        """
+        Find and load all mods in the mod folders.
+        With scan_workers > 1 the mods are loaded on a thread pool while the folders are still being walked,
+        the result is in the same order as with a serial scan.
+        Mods that fail to load are skipped and collected in scan_errors as (path, exception).
+        """
+        folders = self.mod_folders()
+        self.mods_snapshot = ModSnapshot(folders)
+        if self.scan_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.scan_workers) as pool:
+                paths = []
+                futures = []
+                for folder in folders:
+                    for entry in iter_files(folder, "*.mod", 1):
+                        paths.append(Path(entry.path))
+                        futures.append(pool.submit(self._load_mod, paths[-1]))
+                results = [future.result() for future in futures]
+        else:
+            paths = [path for folder in folders for path in find_files(folder, "*.mod", 1)]
+            results = [self._load_mod(path) for path in paths]
+
+        all_mods = []
+        self.scan_errors = []
+        for path, (mod, error) in zip(paths, results):
+            if error:
+                self.scan_errors.append((path, error))
+            elif mod:
+                all_mods.append(mod)
+        self.mod_cache.save()
         return all_mods
+
+    def _load_mod(self, path):
+        """
+        Load a single mod for find_all_mods.
+        :return: (Mod or None if the path is not a file, exception raised while loading or None)
+        """
+        try:
+            if not path.is_file():
+                return None, None
+            return self.mod_cache.load_mod(path), None
+        except Exception as e:
+            return None, e
     
+    def rescan(self):
+        """
+        Scan the mod folders again and apply only the differences to all_mods,
+        the lookup indexes and the dependency graph.
+        Unchanged mods (same size and modification time) keep their Mod instances. Removed mods are deactivated,
+        changed active mods are replaced by their new version in the same place of the load order.
+        :return: ModlistDiff with file names of added, removed and modified mods.
+        """
+        old_by_path = {mod.path: mod for mod in self._all_mods}
+        old_files = self.mods_snapshot.files
+        new_mods = []
+        added = []
+        for mod in self.find_all_mods():
+            old = old_by_path.pop(mod.path, None)
+            # the stat decides, a change that leaves the header alone (e.g. only records) still replaces the mod
+            old_stat = old_files.get(mod.path)
+            if old is not None and old_stat is not None and old_stat == self.mods_snapshot.files.get(mod.path):
+                new_mods.append(old)
+                continue
+            if old is not None:
+                old_by_path[mod.path] = old  # changed, the old instance goes away
+            new_mods.append(mod)
+            added.append(mod)
+
+        removed = set(old_by_path.values())
+        added_by_path = {mod.path: mod for mod in added}
+        replaced = {old: added_by_path[old.path] for old in removed if old.path in added_by_path}
+        self._all_mods = new_mods
+        for mod in removed:
+            self._unindex_mod(mod)
+        # a new mod found in an earlier folder shadows the one indexed so far
+        position = {mod: i for i, mod in enumerate(new_mods)} if added else None
+        for mod in added:
+            self._index_mod(mod, position)
+
+        if not removed.isdisjoint(self._active_positions):
+            self.set_active_mods(replaced.get(mod, mod) for mod in self._active_mods
+                                 if mod not in removed or mod in replaced)
+
+        added_names = {mod.path.name for mod in added if mod not in replaced.values()}
+        removed_names = {mod.path.name for mod in removed if mod not in replaced}
+        modified_names = {mod.path.name for mod in replaced.values()}
+        return ModlistDiff(added=added_names, removed=removed_names, modified=modified_names)
+
     def check_for_new_mods(self):
         """
+        Compare the mod files with their state at the last scan.
+        Only file sizes and modification times are looked at, no mod is loaded.
+        Mods updated in place (e.g. by a workshop update) are reported as modified.
         Return ModlistDiff instance.
         """
-        current_mods = self.find_all_mods()
-        current_mod_names = {mod.path.name for mod in current_mods}
-        existing_mod_names = {mod.path.name for mod in self.all_mods}
-        added_mods = current_mod_names - existing_mod_names
-        removed_mods = existing_mod_names - current_mod_names
-        return ModlistDiff(added=added_mods, removed=removed_mods)
+        return self.mods_snapshot.diff(ModSnapshot(self.mod_folders()))
     
     def find_kenshi_executable(self):
         import re
@@ -371,6 +832,38 @@ class Manager:
                 return item
         return None
     
+    def conflict_index(self) -> ConflictIndex:
+        """
+        Index of the game records changed by the active mods.
+        The records of all active mods are decoded on the first call,
+        afterwards the index follows every change of the active mods.
+        """
+        if self._conflict_index is None:
+            self._conflict_index = ConflictIndex()
+            for mod in self._active_mods:
+                self._conflict_index.add_mod(mod)
+        return self._conflict_index
+
+    def conflicts_for(self, mod: Mod):
+        """
+        Records of an active mod that are also changed by other active mods.
+        :return: Dictionary of record string id -> {other Mod: fields changed by both mods}.
+        """
+        return self.conflict_index().conflicts_for(mod)
+
+    def record_winner(self, string_id, field=None):
+        """
+        Get the active mod whose version of a record (or of one field of it) is used with the current load order.
+        :return: Mod instance or None if no active mod changes the record.
+        """
+        return self.conflict_index().winner(string_id, self._active_positions, field)
+
+    def mods_without_conflicts(self):
+        """
+        Active mods that do not change any record changed by another active mod.
+        """
+        return self.conflict_index().mods_without_conflicts()
+
     def load_prerequisites(self, mod: Mod):
         missing_mods = []
         if not isinstance(mod, Mod):
@@ -378,10 +871,10 @@ class Manager:
         
         for req in mod.requires:
             if req not in BASE_MODS:
-                found_mod = next((m for m in self.all_mods if m.path.name == req), None)
+                found_mod = self._mods_by_filename.get(req)
                 if found_mod:
-                    if found_mod not in self.active_mods:
-                        self.active_mods.append(found_mod)
+                    if not self.is_active(found_mod):
+                        self._activate(found_mod)
                 else:
                     missing_mods.append(req)
         
@@ -390,18 +883,72 @@ class Manager:
     def required_by(self, mod):
         """
         Get a list of mods that require the given mod.
-        :param mod: Mod instance to check.
+        :param mod: Mod instance or mod name to check. The name does not have to belong to an installed mod.
         :return: List of Mod instances that require the given mod.
         """
-        if isinstance(mod, str):
-            if not mod.endswith(".mod"):
-                mod += ".mod"
-            mod = next((m for m in self.all_mods if m.path.name == mod), None)
+        return list(self._required_by.get(self._mod_filename(mod), ()))
 
-        if not mod or not isinstance(mod, Mod):
-            raise ValueError("Mod must be a Mod instance or a valid mod name.")
-        
-        return [m for m in self.all_mods if mod.path.name in m.requires]
+    def referenced_by(self, mod):
+        """
+        Get a list of mods that reference the given mod.
+        :param mod: Mod instance or mod name to check. The name does not have to belong to an installed mod.
+        :return: List of Mod instances that reference the given mod.
+        """
+        return list(self._referenced_by.get(self._mod_filename(mod), ()))
+
+    def dependents(self, mod, active_only=False):
+        """
+        Get all mods that require the given mod, directly or through other mods.
+        With active_only=True this answers "what breaks if I disable this mod",
+        only active mods are returned and followed.
+        :param mod: Mod instance or mod name.
+        :return: List of Mod instances, closest dependents first.
+        """
+        result = {}
+        queue = deque([self._mod_filename(mod)])
+        while queue:
+            name = queue.popleft()
+            for dependent in self._required_by.get(name, ()):
+                if dependent in result or (active_only and dependent not in self._active_positions):
+                    continue
+                result[dependent] = None
+                queue.append(dependent.path.name)
+        return list(result)
+
+    def dependencies(self, mod, transitive=True):
+        """
+        Get the mods the given mod requires, by default including requirements of the requirements.
+        :param mod: Mod instance or mod name.
+        :return: A tuple [0]=list of Mod instances in breadth-first order; [1]=list of required mod names that are not installed
+        """
+        found = {}
+        missing = {}
+        queue = deque([self._mod_filename(mod)])
+        while queue:
+            current = self._mods_by_filename.get(queue.popleft())
+            if current is None:
+                continue
+            for req in current.requires:
+                if req in missing:
+                    continue
+                required_mod = self._mods_by_filename.get(req)
+                if required_mod is None:
+                    missing[req] = None
+                elif required_mod not in found:
+                    found[required_mod] = None
+                    if transitive:
+                        queue.append(req)
+        return list(found), list(missing)
+
+    def _mod_filename(self, mod):
+        """
+        Get the file name (with .mod extension) of a Mod instance or a mod name.
+        """
+        if isinstance(mod, Mod):
+            return mod.path.name
+        if isinstance(mod, str):
+            return mod if mod.endswith(".mod") else mod + ".mod"
+        raise ValueError("Mod must be a Mod instance or a mod name.")
     
 
 if __name__ == "__main__":
@@ -1,3 +1,7 @@
+import mmap
+import struct
+import sys
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
@@ -21,39 +25,235 @@ BASE_MODS = [
 
 BASE_MOD_NAMES = [Path(mod).stem for mod in BASE_MODS]
 
+_INT32 = struct.Struct("<i")
+_UINT32 = struct.Struct("<I")
+_FLOAT = struct.Struct("<f")
+_VEC3 = struct.Struct("<3f")
+_VEC4 = struct.Struct("<4f")
+_REFERENCE_VALUES = struct.Struct("<3i")
+_INSTANCE_TRANSFORM = struct.Struct("<7f")   # position x, y, z and rotation w, x, y, z
+
+
+@contextmanager
+def map_mod_file(path, offset=0):
+    """
+    Memory map a .mod file and get a ModReader over it.
+    Only the pages that are actually decoded are read from disk,
+    and the mapping is released as soon as the with block ends.
+    :param path: Path to the .mod file.
+    :param offset: Offset to start reading from.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = ModReader(mapped, offset)
+        try:
+            yield reader
+        finally:
+            reader.release()
+
+
+class ModReader:
+    """
+    Reads the fields of a .mod file from a buffer (usually a memory mapped file, see map_mod_file).
+    Numbers are unpacked and strings decoded straight from a memoryview of the buffer, nothing is copied.
+    """
+    def __init__(self, buffer, offset=0):
+        """
+        :param buffer: Whole content of the file, any object supporting the buffer protocol.
+        :param offset: Offset to start reading from.
+        """
+        self._view = memoryview(buffer)
+        self._size = len(self._view)
+        self._head = offset
+
+    def tell(self):
+        """Offset of the next unread byte from the start of the file."""
+        return self._head
+
+    def release(self):
+        """Release the buffer, a memory mapping can only be closed once nothing views it."""
+        self._view.release()
+
+    def _require(self, size):
+        if self._head + size > self._size:
+            raise ValueError(f"Unexpected end of mod file at offset {self._head}")
+
+    def unpack(self, st: struct.Struct):
+        """Read one struct.Struct worth of values."""
+        if self._head + st.size > self._size:
+            self._require(st.size)
+        values = st.unpack_from(self._view, self._head)
+        self._head += st.size
+        return values
+
+    def read_32int(self):
+        start = self._head
+        if start + 4 > self._size:  # truncated file, decode whatever is left as it always did
+            self._head = max(start, self._size)
+            return int.from_bytes(self._view[start:self._size], 'little')
+        self._head = start + 4
+        return _UINT32.unpack_from(self._view, start)[0]
+
+    def read_signed_32int(self):
+        head = self._head
+        if head + 4 > self._size:
+            self._require(4)
+        self._head = head + 4
+        return _INT32.unpack_from(self._view, head)[0]
+
+    def read_float(self):
+        return self.unpack(_FLOAT)[0]
+
+    def read_bool(self):
+        self._require(1)
+        value = self._view[self._head] != 0
+        self._head += 1
+        return value
+
+    def read_string(self):
+        length = self.read_32int()
+        if length <= 0:
+            return ""
+        start = self._head
+        self._head = min(start + length, self._size)
+        return str(self._view[start:self._head], 'utf-8', errors='ignore')
+
+    def read_strings(self):
+        strings = self.read_string().split(',')
+        # Remove empty strings
+        return [s for s in strings if s]
+
+    def skip_string(self):
+        """Move past a string without decoding it."""
+        length = self.read_32int()
+        self._head = min(self._head + length, self._size)
+
+    def _read_body_string(self):
+        """Like read_string, but a string cut short by the end of the file is an error."""
+        length = self.read_signed_32int()
+        if length <= 0:
+            return ""
+        start = self._head
+        if start + length > self._size:
+            self._require(length)
+        self._head = start + length
+        return str(self._view[start:self._head], 'utf-8', errors='ignore')
+
+    def read_record(self) -> "ModRecord":
+        """
+        Read one record from the body of a .mod file.
+        Layout (all integers are little endian int32, strings are int32 length + utf-8 bytes):
+        instance count, type, id, name, string id, change type,
+        then typed field blocks, each starting with the number of entries:
+        bool (key + 1 byte), float (key + float32), int (key + int32), vec3 (key + 3 float32),
+        vec4 (key + 4 float32), string (key + string), filename (key + string),
+        references (category + number of targets + target id + 3 int32 values),
+        instances (id + target + 7 float32 + number of states + state strings).
+        """
+        record = ModRecord(
+            instance_count=self.read_signed_32int(),
+            record_type=self.read_signed_32int(),
+            record_id=self.read_signed_32int(),
+            name=self._read_body_string(),
+            string_id=self._read_body_string(),
+            change_type=self.read_signed_32int(),
+        )
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.bools[key] = self.read_bool()
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.floats[key] = self.read_float()
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.ints[key] = self.read_signed_32int()
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.vec3s[key] = self.unpack(_VEC3)
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.vec4s[key] = self.unpack(_VEC4)
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.strings[key] = self._read_body_string()
+        for _ in range(self.read_signed_32int()):
+            key = self._read_body_string()
+            record.filenames[key] = self._read_body_string()
+        for _ in range(self.read_signed_32int()):
+            category = record.references.setdefault(self._read_body_string(), {})
+            for _ in range(self.read_signed_32int()):
+                target = self._read_body_string()
+                category[target] = self.unpack(_REFERENCE_VALUES)
+        for _ in range(self.read_signed_32int()):
+            instance_id = self._read_body_string()
+            target = self._read_body_string()
+            transform = self.unpack(_INSTANCE_TRANSFORM)
+            states = [self._read_body_string() for _ in range(self.read_signed_32int())]
+            record.instances[instance_id] = (target, transform[:3], transform[3:], states)
+        return record
+
+
+class ModRecord:
+    """
+    One record (game data item) from the body of a .mod file, see ModReader.read_record.
+    """
+    def __init__(self, instance_count, record_type, record_id, name, string_id, change_type):
+        self.instance_count: int = instance_count
+        self.type: int = record_type
+        self.id: int = record_id
+        self.name: str = name
+        self.string_id: str = string_id   # unique across mods, e.g. "1234-mymod.mod"
+        self.change_type: int = change_type
+        self.bools: dict[str, bool] = {}
+        self.floats: dict[str, float] = {}
+        self.ints: dict[str, int] = {}
+        self.vec3s: dict[str, tuple[float, float, float]] = {}
+        self.vec4s: dict[str, tuple[float, float, float, float]] = {}
+        self.strings: dict[str, str] = {}
+        self.filenames: dict[str, str] = {}
+        self.references: dict[str, dict[str, tuple[int, int, int]]] = {}   # category -> target id -> values
+        # instance id -> (target, position (x, y, z), rotation (w, x, y, z), states)
+        self.instances: dict[str, tuple[str, tuple, tuple, list[str]]] = {}
+
+    def __repr__(self):
+        return f"ModRecord({self.type}, '{self.string_id}', '{self.name}')"
+
 
 class Mod:
+    # Thousands of mods can be loaded at once, so a Mod keeps only what is needed for the mod list:
+    # no __dict__, interned strings (authors and required mods repeat a lot), the date as an int timestamp,
+    # and the description is read from the file only when it is asked for.
+    __slots__ = ("path", "name", "version", "author", "requires", "references", "steam_workshop_id",
+                 "_date_added", "_has_preview_img", "_description_offset", "_header_size")
+
     def __init__(self, path):
+        """
+        :param path: Path to the .mod file.
+        Only the header is read, through a memory mapping that is closed right after.
+        """
         self.path = Path(path)
         if not self.path.exists():
             raise FileNotFoundError(f"Mod path does not exist: {self.path}")
         
-        preview_img_name = f"_{self.path.stem}.img" # DEV-NOTE: it seems to always be .img file, but I guess other formats are possible
-        self.preview_img_path = self.path.parent / preview_img_name
-        if not self.preview_img_path.exists():
-            self.preview_img_path = None
+        self._has_preview_img = self._preview_img_path().exists()
         
-        self.name: str = self.path.stem
-        self.version: str = ""
+        self.name: str = sys.intern(self.path.stem)
+        self.version: int = 0
         self.author: str = ""
-        self.description: str = ""
-        self.requires: list[str] = []
-        self.references: list[str] = []
+        self.requires: tuple[str, ...] = ()
+        self.references: tuple[str, ...] = ()
+        stat = self.path.stat()
         try:
-            self.date_added: datetime = datetime.fromtimestamp(self.path.stat().st_birthtime)   # may 
+            self._date_added = int(stat.st_birthtime)
         except AttributeError:
-            self.date_added = datetime.fromtimestamp(self.path.stat().st_mtime)
+            self._date_added = int(stat.st_mtime)
 
-        self._stream: bytes = b""
-        self._head = 0
-        with open(self.path, 'rb') as f:
-            self._stream = f.read()
+        if not stat.st_size:
+            raise ValueError("Mod stream is empty")
 
-        self._parse_mod_info()
+        with map_mod_file(self.path) as reader:
+            self._header_size = self._parse_mod_info(reader)   # the records start here
 
         self.steam_workshop_id = None
-        self.web_url = ""
-        self.steam_url = ""
         self._get_steam_info()
 
         if not self.web_url:
@@ -68,58 +268,131 @@ class Mod:
     
     def __repr__(self):
         return f"Mod('{self.name}', '{self.version}', '{self.author}')"
-    
-    def _parse_mod_info(self):
-        """Parse the mod information from the binary stream."""
-        if not self._stream:
-            raise ValueError("Mod stream is empty")
-        
-        ftype = self.read_32int()
+
+    @property
+    def date_added(self) -> datetime:
+        return datetime.fromtimestamp(self._date_added)
+
+    @property
+    def description(self) -> str:
+        """
+        Description from the mod header, read from the file on every access.
+        """
+        try:
+            with map_mod_file(self.path, self._description_offset) as reader:
+                return reader.read_string()
+        except (OSError, ValueError):
+            return ""
+
+    @property
+    def preview_img_path(self) -> Path | None:
+        return self._preview_img_path() if self._has_preview_img else None
+
+    @property
+    def web_url(self) -> str:
+        if not self.steam_workshop_id:
+            return ""
+        return f"https://steamcommunity.com/sharedfiles/filedetails/?id={self.steam_workshop_id}"
+
+    @property
+    def steam_url(self) -> str:
+        if not self.steam_workshop_id:
+            return ""
+        return f"steam://url/CommunityFilePage/{self.steam_workshop_id}"
+
+    def _preview_img_path(self):
+        return self.path.parent / f"_{self.path.stem}.img" # DEV-NOTE: it seems to always be .img file, but I guess other formats are possible
+
+    def _parse_mod_info(self, reader):
+        """
+        Parse the mod information from the start of the file.
+        :param reader: ModReader positioned at the start of the file.
+        :return: Offset at which the records start.
+        """
+        ftype = reader.read_32int()
         if ftype != FILE_TYPE_MOD and ftype != FILE_TYPE_MMOD:
             raise ValueError(f"Invalid file type: {ftype}, expected {FILE_TYPE_MOD} or {FILE_TYPE_MMOD}")
         
+        header_end = None
         if ftype == FILE_TYPE_MMOD:
-            self.read_32int()   # merged mods also contain another 32-bit integer to tell us where the header ends
+            header_end = reader.read_32int()   # merged mods also contain another 32-bit integer to tell us where the header ends
+        
+        self.version = reader.read_32int()
+        self.author = sys.intern(reader.read_string())
+        self._description_offset = reader.tell()
+        reader.skip_string()
+        requires = reader.read_strings()
+        self.requires = tuple(sys.intern(req) for req in requires if req not in BASE_MODS)  # remove base mods from requires
+        self.references = tuple(sys.intern(ref) for ref in reader.read_strings())
         
-        self.version = self.read_32int()
-        self.author = self.read_string()
-        self.description = self.read_string()
-        self.requires = self.read_strings()
-        self.requires = [req for req in self.requires if req not in BASE_MODS]  # remove base mods from requires
-        self.references = self.read_strings()
+        if header_end is None or header_end == reader.tell():
+            return reader.tell()
+        if header_end < reader.tell():
+            # not what we think the value is, the records follow the references like in a normal mod
+            print(f"Warning: {self.path.name} declares its header ends at {header_end}, "
+                  f"but the header fields end at {reader.tell()}. Ignoring it.")
+            return reader.tell()
+        return header_end   # anything between the references and the declared end is not part of the records
     
+    def records(self):
+        """
+        Decode the records of the mod one at a time.
+        The file is memory mapped while the generator runs, so only the pages being decoded are resident.
+        :return: Generator of ModRecord, in the order they are stored in the file.
+        """
+        with map_mod_file(self.path, self._header_size) as reader:
+            reader.read_signed_32int()   # last used record id
+            record_count = reader.read_signed_32int()
+            for _ in range(record_count):
+                yield reader.read_record()
+
     def _get_steam_info(self):
         parent = self.path.parent
         steam_info = parent / f"_{self.path.stem}.info" # should be an XML file with <id>...</id> tag containing the Steam Workshop ID
         if steam_info.exists():
             with open(steam_info, 'r', encoding='utf-8') as f:
                 content = f.read()
-                start = content.find("<id>") + 4    # TODO: probably should use XML parser
+                start = content.find("<id>")    # TODO: probably should use XML parser
                 end = content.find("</id>", start)
                 if start != -1 and end != -1:
-                    self.workshop_id = content[start:end]
-                    self.web_url = f"https://steamcommunity.com/sharedfiles/filedetails/?id={self.workshop_id}"
-                    self.steam_url = f"steam://url/CommunityFilePage/{self.workshop_id}"
+                    self.steam_workshop_id = content[start + 4:end]
         # DEV-NOTE: steam info contains more data, do we need it?
 
-    def read_32int(self):
-        start = self._head
-        self._head += 4
-        return int.from_bytes(self._stream[start:self._head], 'little')
-    
-    def read_string(self):
-        length = self.read_32int()
-        if length <= 0:
-            return ""
-        start = self._head
-        self._head += length
-        return self._stream[start:self._head].decode('utf-8', errors='ignore')
-    
-    def read_strings(self):
-        strings = self.read_string().split(',')
-        # Remove empty strings
-        return [s for s in strings if s]
+    def to_cache_entry(self) -> dict:
+        """
+        Everything needed to recreate this Mod without reading the .mod file again.
+        See Mod.from_cache_entry.
+        """
+        return {
+            "version": self.version,
+            "author": self.author,
+            "description_offset": self._description_offset,
+            "requires": self.requires,
+            "references": self.references,
+            "date_added": self._date_added,
+            "header_size": self._header_size,
+            "has_preview_img": self._has_preview_img,
+            "workshop_id": self.steam_workshop_id,
+        }
 
+    @classmethod
+    def from_cache_entry(cls, path, entry: dict):
+        """
+        Create a Mod from data produced by Mod.to_cache_entry, without touching the .mod file.
+        """
+        mod = cls.__new__(cls)
+        mod.path = Path(path)
+        mod.name = sys.intern(mod.path.stem)
+        mod.version = entry["version"]
+        mod.author = sys.intern(entry["author"])
+        mod.requires = tuple(sys.intern(req) for req in entry["requires"])
+        mod.references = tuple(sys.intern(ref) for ref in entry["references"])
+        mod.steam_workshop_id = entry["workshop_id"]
+        mod._date_added = entry["date_added"]
+        mod._has_preview_img = entry["has_preview_img"]
+        mod._description_offset = entry["description_offset"]
+        mod._header_size = entry["header_size"]
+        return mod
 
 if __name__ == "__main__":
     # tests
@@ -136,6 +409,7 @@ if __name__ == "__main__":
                 print(f"Reference: {ref}")
             for req in mod.requires:
                 print(f"Requires: {req}")
+            print(f"Records: {sum(1 for _ in mod.records())}")
         except FileNotFoundError as e:
             print(e)
         except Exception as e:
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from config import APP_NAME, Config
+from file_utils import read_json_cache, write_json_cache
+from mod import Mod
+
+
+CACHE_FILE = "mod_cache.json"
+
+# bump whenever the shape of the cached entries changes, old caches are then simply discarded
+CACHE_VERSION = 3
+
+
+class ModCache:
+    """
+    Persistent cache of parsed mod headers, stored next to config.json.
+    Entries are keyed by the .mod path and revalidated by (st_size, st_mtime_ns),
+    so only new or changed mods have to be read and parsed again.
+    load_mod is safe to call from several scanning threads at once.
+    """
+    def __init__(self, cache_path=None):
+        if cache_path is None:
+            cache_path = Config.get_config_file_path(APP_NAME, CACHE_FILE)
+        self.cache_path = Path(cache_path)
+        self._entries: dict[str, dict] = self._load()
+        self._seen: set[str] = set()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load_mod(self, path) -> Mod:
+        """
+        Get a Mod for the given .mod file, from the cache if the file did not change since it was cached.
+        :param path: Path to the .mod file.
+        :return: Mod instance.
+        """
+        path = Path(path)
+        key = str(path)
+        stat = path.stat()
+        self._seen.add(key)
+
+        entry = self._entries.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return Mod.from_cache_entry(path, entry)
+
+        mod = Mod(path)
+        entry = mod.to_cache_entry()
+        entry["size"] = stat.st_size
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self._entries[key] = entry
+        self._dirty = True
+        return mod
+
+    def save(self):
+        """
+        Write the cache to disk if anything changed.
+        Entries of mods that were not loaded since the last save are dropped (deleted or moved mods).
+        """
+        stale = self._entries.keys() - self._seen
+        for key in stale:
+            del self._entries[key]
+        self._seen.clear()
+        if not (self._dirty or stale):
+            return
+
+        write_json_cache(self.cache_path, CACHE_VERSION, "mods", self._entries)
+        self._dirty = False
+
+    def _load(self):
+        """
+        Load the cache file. A missing, corrupted or outdated cache is treated as empty.
+        """
+        return read_json_cache(self.cache_path, CACHE_VERSION, "mods")
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from config import APP_NAME, Config
+from file_utils import write_text_atomic
+from load_order import read_modlist
+
+
+PROFILES_DIR = "profiles"
+PROFILE_SUFFIX = ".txt"
+
+
+class ProfileStore:
+    """
+    Named modlists stored as <config dir>/profiles/<name>.txt, in the same format as exported modlists.
+    """
+    def __init__(self, profiles_dir=None):
+        if profiles_dir is None:
+            profiles_dir = Config.get_config_dir(APP_NAME) / PROFILES_DIR
+        self.profiles_dir = Path(profiles_dir)
+
+    def names(self) -> list[str]:
+        """Names of all saved profiles, sorted."""
+        if not self.profiles_dir.is_dir():
+            return []
+        return sorted(path.stem for path in self.profiles_dir.glob(f"*{PROFILE_SUFFIX}"))
+
+    def exists(self, name):
+        return self.path_of(name).is_file()
+
+    def load(self, name) -> list[str]:
+        """
+        Mod file names of a profile in load order.
+        """
+        path = self.path_of(name)
+        if not path.is_file():
+            raise FileNotFoundError(f"Profile not found: {name}")
+        return read_modlist(path)
+
+    def save(self, name, mod_names) -> bool:
+        """
+        Save a profile, replacing a profile with the same name.
+        :param mod_names: Mod file names in load order.
+        :return: True if the profile file was written, False if it already had this content.
+        """
+        path = self.path_of(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return write_text_atomic(path, ''.join(mod_name + '\n' for mod_name in mod_names), encoding="utf-8")
+
+    def delete(self, name):
+        self.path_of(name).unlink(missing_ok=True)
+
+    def path_of(self, name) -> Path:
+        """
+        Path of the profile file. The name must be usable as a file name.
+        """
+        name = name.strip() if isinstance(name, str) else ""
+        if not name or name != Path(name).name or name in (".", ".."):
+            raise ValueError(f"Invalid profile name: '{name}'")
+        return self.profiles_dir / f"{name}{PROFILE_SUFFIX}"
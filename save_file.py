@@ -0,0 +1,134 @@
+import struct
+from pathlib import Path
+
+from mod import FILE_TYPE_DATA
+
+
+# type of the base game entries (gamedata.base, rebirth.mod, ...) in the mod list of a save
+VANILLA_MOD_TYPE = 4294967295
+
+# The mod list is in the header of the save, right after a length prefixed "mods" key.
+MODS_KEY = struct.pack("<I", 4) + b"mods"
+
+SAVE_CHUNK_SIZE = 16 * 1024
+MAX_PREFIX_SIZE = 64 * 1024         # the mod list is expected within the first few KB, give up soon after
+MAX_MOD_COUNT = 2000                # I highly doubt there will be more than 2000 mods in a save file
+MAX_MOD_NAME_LENGTH = 1024
+
+_UINT32 = struct.Struct("<I")
+_ENTRY_TAIL_SIZE = 8    # bytes after the type of every entry, meaning unknown
+
+
+class SaveReader:
+    """
+    Reads the start of a .save file in chunks, only as far as the mod list.
+    Late game saves are hundreds of MB, but the mod list is in the header.
+    """
+    def __init__(self, f, chunk_size=SAVE_CHUNK_SIZE, max_size=MAX_PREFIX_SIZE):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._max_size = max_size
+        self._buffer = bytearray()
+        self._eof = False
+
+    def _read_chunk(self):
+        if self._eof or len(self._buffer) >= self._max_size:
+            return False
+        chunk = self._file.read(min(self._chunk_size, self._max_size - len(self._buffer)))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def available(self, end):
+        """Buffer the file up to `end`. Return False if the file (or the allowed prefix) ends sooner."""
+        while len(self._buffer) < end:
+            if not self._read_chunk():
+                return False
+        return True
+
+    def find(self, pattern, start):
+        """
+        Offset of the next occurrence of `pattern` at or after `start`, reading more of the file as needed.
+        Return -1 if it is not in the allowed prefix of the file.
+        """
+        while True:
+            index = self._buffer.find(pattern, start)
+            if index != -1:
+                return index
+            # the pattern may continue in the next chunk
+            start = max(start, len(self._buffer) - len(pattern) + 1)
+            if not self._read_chunk():
+                return -1
+
+    def read_uint32(self, offset):
+        if not self.available(offset + 4):
+            return None
+        return _UINT32.unpack_from(self._buffer, offset)[0]
+
+    def read_bytes(self, offset, size):
+        if not self.available(offset + size):
+            return None
+        return bytes(self._buffer[offset:offset + size])
+
+
+def read_save_mods(save_path) -> list[tuple[str, int]]:
+    """
+    Read the mod list stored in a Kenshi save.
+    Only the start of the file is read, up to the end of the mod list.
+    :param save_path: Path to the .save file.
+    :return: List of (mod name, mod type) in load order, base game entries have type VANILLA_MOD_TYPE.
+    :raises ValueError: If the file is not a save or the mod list cannot be decoded.
+    """
+    save_path = Path(save_path)
+    with open(save_path, 'rb') as f:
+        reader = SaveReader(f)
+        file_type = reader.read_uint32(0)
+        if file_type != FILE_TYPE_DATA:
+            raise ValueError(f"Not a save file: {save_path.name} (file type {file_type}, expected {FILE_TYPE_DATA})")
+
+        index = reader.find(MODS_KEY, 4)
+        while index != -1:
+            mods = _read_mod_list(reader, index + len(MODS_KEY))
+            if mods is not None:
+                return mods
+            # "mods" is a common word, look for the next key that is followed by a valid list
+            index = reader.find(MODS_KEY, index + 1)
+    raise ValueError(f"Mod list not found in the first {MAX_PREFIX_SIZE // 1024} KB of {save_path.name}")
+
+
+def _read_mod_list(reader: SaveReader, offset):
+    """
+    Decode the mod list starting at `offset` (right after the "mods" key).
+    Layout: uint32 count, then for every mod: uint32 name length, name, uint32 type, 8 unknown bytes.
+    The list always contains the base game entries, so an empty one is a false match.
+    :return: List of (mod name, mod type) or None if the bytes do not look like a mod list.
+    """
+    count = reader.read_uint32(offset)
+    if not count or count > MAX_MOD_COUNT:
+        return None
+    offset += 4
+    mods = []
+    for _ in range(count):
+        name_length = reader.read_uint32(offset)
+        if name_length is None or not 0 < name_length <= MAX_MOD_NAME_LENGTH:
+            return None
+        name = reader.read_bytes(offset + 4, name_length)
+        offset += 4 + name_length
+        mod_type = reader.read_uint32(offset)
+        if name is None or mod_type is None or b"\0" in name:
+            return None
+        offset += 4 + _ENTRY_TAIL_SIZE
+        mods.append((name.decode('utf-8', errors='ignore'), mod_type))
+    if not reader.available(offset):
+        return None
+    return mods
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        print(f"{path}:")
+        for name, mod_type in read_save_mods(path):
+            print(f"  {name}{' (base game)' if mod_type == VANILLA_MOD_TYPE else ''}")
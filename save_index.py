@@ -0,0 +1,170 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import APP_NAME, Config
+from file_utils import read_json_cache, write_json_cache
+from save_file import VANILLA_MOD_TYPE, read_save_mods
+
+
+SAVE_INDEX_FILE = "save_index.json"
+
+# bump whenever the shape of the cached entries changes, old indexes are then simply discarded
+SAVE_INDEX_VERSION = 1
+
+SAVE_INDEX_WORKERS = 4
+
+
+class SaveInfo:
+    """
+    Mod list of one .save file.
+    """
+    def __init__(self, path, size, mtime_ns, mods=None, error=None):
+        self.path = Path(path)
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.mods: list[tuple[str, int]] = mods or []   # (mod name, mod type) in load order
+        self.error: str | None = error                   # why the mod list could not be read
+
+    def __repr__(self):
+        return f"SaveInfo('{self.name}', {len(self.mod_names)} mods)"
+
+    @property
+    def name(self):
+        """Name of the save (its folder)."""
+        return self.path.parent.name
+
+    @property
+    def mod_names(self) -> list[str]:
+        """Names of the mods used by the save in load order, without the base game."""
+        return [name for name, mod_type in self.mods if mod_type != VANILLA_MOD_TYPE]
+
+    def to_cache_entry(self) -> dict:
+        return {"size": self.size, "mtime_ns": self.mtime_ns, "mods": self.mods, "error": self.error}
+
+    @classmethod
+    def from_cache_entry(cls, path, entry: dict):
+        return cls(path, entry["size"], entry["mtime_ns"], [tuple(mod) for mod in entry["mods"]], entry["error"])
+
+
+class SaveIndex:
+    """
+    Mod lists of all saves in the saves folder (every <save name>/*.save).
+    Only the start of every save is read (see save_file.read_save_mods), on a thread pool,
+    and the results are cached next to config.json, revalidated by (st_size, st_mtime_ns).
+    refresh() may run in a background thread, the queries always see the result of the last finished refresh.
+    """
+    def __init__(self, saves_dir, index_path=None, workers=SAVE_INDEX_WORKERS):
+        if index_path is None:
+            index_path = Config.get_config_file_path(APP_NAME, SAVE_INDEX_FILE)
+        self.saves_dir = Path(saves_dir)
+        self.index_path = Path(index_path)
+        self.workers = workers
+        self._lock = threading.Lock()           # guards _saves and _saves_by_mod
+        self._refresh_lock = threading.Lock()   # one refresh at a time
+        self._saves: dict[Path, SaveInfo] = {}
+        self._saves_by_mod: dict[str, list[SaveInfo]] = {}
+        self.refreshed = False   # True once the first refresh finished
+
+    def refresh(self):
+        """
+        Find all saves and read the mod lists of new and changed ones.
+        :return: List of SaveInfo of all saves.
+        """
+        with self._refresh_lock:
+            cached = self._load()
+            saves = {}
+            to_read = []
+            for path, stat in self._find_saves():
+                entry = cached.get(str(path))
+                if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    saves[path] = SaveInfo.from_cache_entry(path, entry)
+                else:
+                    to_read.append((path, stat))
+
+            if to_read:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    for info in pool.map(lambda item: self._read_save(*item), to_read):
+                        saves[info.path] = info
+
+            saves_by_mod = {}
+            for info in saves.values():
+                for name in dict.fromkeys(info.mod_names):
+                    saves_by_mod.setdefault(name, []).append(info)
+            with self._lock:
+                self._saves = saves
+                self._saves_by_mod = saves_by_mod
+                self.refreshed = True
+            if to_read or len(saves) != len(cached):
+                self._save(saves)
+            return list(saves.values())
+
+    @property
+    def saves(self) -> list[SaveInfo]:
+        with self._lock:
+            return list(self._saves.values())
+
+    def get(self, save_path) -> SaveInfo:
+        """
+        Mod list of a single save, from the index if the save did not change since, otherwise read now.
+        """
+        save_path = Path(save_path)
+        stat = save_path.stat()
+        with self._lock:
+            info = self._saves.get(save_path)
+        if info and info.size == stat.st_size and info.mtime_ns == stat.st_mtime_ns:
+            return info
+        return self._read_save(save_path, stat)
+
+    def saves_using(self, mod_name) -> list[SaveInfo]:
+        """
+        Saves that use a mod.
+        :param mod_name: Name of the mod as stored in saves, i.e. the file name without .mod.
+        """
+        with self._lock:
+            return list(self._saves_by_mod.get(mod_name, ()))
+
+    def compatible_saves(self, mod_names) -> list[SaveInfo]:
+        """
+        Saves whose mods are all in the given mod names, e.g. the current active mods.
+        Saves with an unreadable mod list are never compatible.
+        """
+        mod_names = set(mod_names)
+        with self._lock:
+            return [info for info in self._saves.values() if not info.error and mod_names.issuperset(info.mod_names)]
+
+    def _find_saves(self):
+        """(path, stat) of every .save file in the save folders."""
+        saves = []
+        try:
+            with os.scandir(self.saves_dir) as folders:
+                save_folders = [entry.path for entry in folders if entry.is_dir()]
+        except OSError:
+            return saves
+        for folder in save_folders:
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".save") and entry.is_file():
+                            saves.append((Path(entry.path), entry.stat()))
+            except OSError:
+                continue
+        return saves
+
+    @staticmethod
+    def _read_save(path, stat):
+        try:
+            return SaveInfo(path, stat.st_size, stat.st_mtime_ns, read_save_mods(path))
+        except (OSError, ValueError) as e:
+            return SaveInfo(path, stat.st_size, stat.st_mtime_ns, error=str(e))
+
+    def _load(self):
+        """
+        Load the index file. A missing, corrupted or outdated index is treated as empty.
+        """
+        return read_json_cache(self.index_path, SAVE_INDEX_VERSION, "saves")
+
+    def _save(self, saves: dict[Path, SaveInfo]):
+        write_json_cache(self.index_path, SAVE_INDEX_VERSION, "saves",
+                         {str(path): info.to_cache_entry() for path, info in saves.items()})
@@ -1,11 +1,16 @@
 import os
 import platform
+import threading
 import vdf
 
 
 KENSHI_WORKSHOP_ID = "233860" # Steam Workshop ID for Kenshi
 KENSHI_STEAM_NAME = "Kenshi"
 
+# the only keys read from libraryfolders.vdf and appmanifest_*.acf
+LIBRARY_FOLDER_PATHS = [("libraryfolders", vdf.ANY_KEY, "path")]
+APP_MANIFEST_PATHS = [("AppState", "appid"), ("AppState", "name"), ("AppState", "installdir")]
+
 
 class SteamGame:
     def __init__(self, appid, name, install_dir):
@@ -88,7 +93,7 @@ def get_steam_library_folders(steam_install_path):
 
     try:
         with open(library_folders_path, 'r', encoding='utf-8') as f:
-            library_data = vdf.load(f)
+            library_data = vdf.load(f, paths=LIBRARY_FOLDER_PATHS)
 
         if 'libraryfolders' in library_data:
             for key, value in library_data['libraryfolders'].items():
@@ -119,53 +124,159 @@ def get_installed_steam_games(library_paths):
 
         for filename in os.listdir(steamapps_folder):
             if filename.startswith("appmanifest_") and filename.endswith(".acf"):
-                filepath = os.path.join(steamapps_folder, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                        game_data = vdf.load(f)
-                    
-                    app_state = game_data.get("AppState", {})
-                    appid = app_state.get("appid")
-                    name = app_state.get("name")
-                    install_dir_relative = app_state.get("installdir")
-
-                    if appid and name and install_dir_relative:
-                        # Construct the full game path using the 'common' folder for this specific library
-                        game_folder = os.path.join(common_path, install_dir_relative)
-                        
-                        if os.path.isdir(game_folder):
-                            installed_games.append(SteamGame(appid, name, game_folder))
-                        else:
-                            print(f"Warning: Game folder '{game_folder}' for '{name}' (AppID: {appid}) does not exist. Manifest might be outdated or game moved.")
-                except Exception as e:
-                    print(f"Error parsing {filename}: {e}")
+                game = read_app_manifest(os.path.join(steamapps_folder, filename))
+                if game:
+                    installed_games.append(game)
     return installed_games
 
 
-def get_workshop_of(appid):
+def read_app_manifest(manifest_path):
     """
-    Return the path to the Steam Workshop folder for a given appid.
+    Read an appmanifest_<appid>.acf file.
+    :param manifest_path: Path to the manifest in a 'steamapps' folder.
+    :return: SteamGame or None if the manifest is unreadable or the game folder does not exist.
     """
-    appid = str(appid)
+    common_path = os.path.join(os.path.dirname(manifest_path), "common")
+    try:
+        with open(manifest_path, 'r', encoding='utf-8', errors='ignore') as f:
+            game_data = vdf.load(f, paths=APP_MANIFEST_PATHS)
 
-    steam_path = get_steam_install_path()
-    if not steam_path:
-        print("Steam installation path could not be determined.")
-        return None
-    
-    library_folders = get_steam_library_folders(steam_path)
-    if not library_folders:
-        print("No Steam library folders found.")
+        app_state = game_data.get("AppState", {})
+        appid = app_state.get("appid")
+        name = app_state.get("name")
+        install_dir_relative = app_state.get("installdir")
+
+        if appid and name and install_dir_relative:
+            # Construct the full game path using the 'common' folder for this specific library
+            game_folder = os.path.join(common_path, install_dir_relative)
+
+            if os.path.isdir(game_folder):
+                return SteamGame(appid, name, game_folder)
+            print(f"Warning: Game folder '{game_folder}' for '{name}' (AppID: {appid}) does not exist. Manifest might be outdated or game moved.")
+    except Exception as e:
+        print(f"Error parsing {os.path.basename(manifest_path)}: {e}")
+    return None
+
+
+def _mtime_ns(path):
+    """Modification time of a file, None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
         return None
-    
-    workshop_path = None
-    for library in library_folders:
-        potential_path = os.path.join(library, "workshop", "content", appid)
-        if os.path.isdir(potential_path):
-            workshop_path = potential_path
-            break
-
-    return workshop_path
+
+
+class SteamLocator:
+    """
+    Cached Steam discovery: install path, library folders, installed games and workshop folders.
+    The library folders are re-read only when libraryfolders.vdf changes (checked by its mtime),
+    a game is found by opening its appmanifest_<appid>.acf directly and re-read only when that manifest changes.
+    All lookups after the first cost a few stat calls, so they can be used on every rescan.
+    """
+    def __init__(self, steam_install_path=None):
+        """
+        :param steam_install_path: Steam folder, None = find it with get_steam_install_path on first use.
+        """
+        self._lock = threading.RLock()
+        self._install_path = steam_install_path
+        self._install_path_resolved = steam_install_path is not None
+        self._libraries_mtime = None
+        self._libraries: list[str] | None = None
+        self._games: dict[str, tuple] = {}       # appid -> (library folders, manifest path, manifest mtime_ns, SteamGame or None)
+        self._workshops: dict[str, tuple] = {}   # appid -> (library folders it was searched in, workshop path)
+
+    def clear(self):
+        """Forget everything, including the Steam install path."""
+        with self._lock:
+            self._install_path_resolved = False
+            self._install_path = None
+            self._libraries = None
+            self._games.clear()
+            self._workshops.clear()
+
+    @property
+    def install_path(self):
+        """
+        Steam folder, looked up until it is found: Steam may be installed after the app started.
+        """
+        with self._lock:
+            if not self._install_path_resolved:
+                self._install_path = get_steam_install_path()
+                self._install_path_resolved = self._install_path is not None
+            return self._install_path
+
+    def library_folders(self) -> list[str]:
+        """
+        The 'steamapps' folders of all Steam libraries, see get_steam_library_folders.
+        """
+        with self._lock:
+            steam_path = self.install_path
+            if not steam_path:
+                return []
+            mtime = _mtime_ns(os.path.join(steam_path, "steamapps", "libraryfolders.vdf"))
+            if self._libraries is None or mtime != self._libraries_mtime:
+                self._libraries = get_steam_library_folders(steam_path)
+                self._libraries_mtime = mtime
+            return self._libraries
+
+    def installed_game(self, appid) -> SteamGame | None:
+        """
+        Find an installed game by its appid, opening only its appmanifest_<appid>.acf in each library.
+        """
+        appid = str(appid)
+        manifest_name = f"appmanifest_{appid}.acf"
+        with self._lock:
+            library_folders = self.library_folders()
+            cached = self._games.get(appid)
+            if cached and cached[0] is library_folders and _mtime_ns(cached[1]) == cached[2]:
+                return cached[3]
+            self._games.pop(appid, None)   # not installed, look again next time
+            for library in library_folders:
+                manifest_path = os.path.join(library, manifest_name)
+                mtime = _mtime_ns(manifest_path)
+                if mtime is None:
+                    continue
+                game = read_app_manifest(manifest_path)
+                self._games[appid] = (library_folders, manifest_path, mtime, game)
+                if game:
+                    return game
+            return None
+
+    def workshop_of(self, appid):
+        """
+        Path to the Steam Workshop folder of a game, None if there is none.
+        """
+        appid = str(appid)
+        with self._lock:
+            library_folders = self.library_folders()
+            cached = self._workshops.get(appid)
+            if cached and cached[0] is library_folders and cached[1] and os.path.isdir(cached[1]):
+                return cached[1]
+            workshop_path = None
+            for library in library_folders:
+                potential_path = os.path.join(library, "workshop", "content", appid)
+                if os.path.isdir(potential_path):
+                    workshop_path = potential_path
+                    break
+            self._workshops[appid] = (library_folders, workshop_path)
+            return workshop_path
+
+
+steam_locator = SteamLocator()
+
+
+def get_installed_game(appid) -> SteamGame | None:
+    """
+    Return the installed game with the given appid, None if it is not installed. Cached, see SteamLocator.
+    """
+    return steam_locator.installed_game(appid)
+
+
+def get_workshop_of(appid):
+    """
+    Return the path to the Steam Workshop folder for a given appid. Cached, see SteamLocator.
+    """
+    return steam_locator.workshop_of(appid)
     
 
 def open_steam_with_url(url):
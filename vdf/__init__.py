@@ -4,11 +4,13 @@ Module for deserializing/serializing to and from VDF
 __version__ = "3.4"
 __author__ = "Rossen Georgiev"
 
+import io
+import mmap
+import os
 import re
 import sys
 import struct
 from binascii import crc32
-from io import BytesIO
 from io import StringIO as unicodeIO
 
 try:
@@ -58,14 +60,205 @@ def _re_escape_match(m):
 def _re_unescape_match(m):
     return _unescape_char_map[m.group()]
 
+_re_needs_escape = re.compile(r"[\n\t\v\b\r\f\a\\\?\"']")
+_escape_table = {ord(char): escaped for char, escaped in _escape_char_map.items()}
+
 def _escape(text):
-    return re.sub(r"[\n\t\v\b\r\f\a\\\?\"']", _re_escape_match, text)
+    if _re_needs_escape.search(text) is None:
+        return text
+    return text.translate(_escape_table)
 
 def _unescape(text):
+    if '\\' not in text:
+        return text
     return re.sub(r"(\\n|\\t|\\v|\\b|\\r|\\f|\\a|\\\\|\\\?|\\\"|\\')", _re_unescape_match, text)
 
+# characters of unquoted keys and values, [a-z] under re.IGNORECASE also matches these
+_CASEFOLD_LETTERS = u'İıſK'
+_LETTERS_DIGITS = u'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789' + _CASEFOLD_LETTERS
+_KEY_CHARS = frozenset(_LETTERS_DIGITS + u'-_\\?$%<>')
+_VALUE_CHARS = frozenset(_LETTERS_DIGITS + u'-_\\?*.$<> ')
+
+# states of a scanned quoted string
+_QUOTE_CLOSED = 0   # ends at the returned index
+_QUOTE_OPEN = 1     # continues on the next line, scanning resumes at the returned index
+_QUOTE_BROKEN = 2   # backslash before a newline, the string can never be closed
+
+def _scan_quoted(text, pos):
+    """
+    Scan the content of a quoted string from ``pos`` (after the opening quote) the way
+    ``"(?:\\.|[^\\"])*"`` matches it: a backslash escapes any character except a newline.
+    Returns ``(index, state)``.
+    """
+    length = len(text)
+    quote = text.find('"', pos)
+    while True:
+        backslash = text.find('\\', pos, length if quote == -1 else quote)
+        if backslash == -1:
+            if quote == -1:
+                return length, _QUOTE_OPEN
+            return quote, _QUOTE_CLOSED
+        if backslash + 1 == length:
+            return backslash, _QUOTE_OPEN
+        if text[backslash + 1] == '\n':
+            return backslash, _QUOTE_BROKEN
+        pos = backslash + 2
+        if quote != -1 and quote < pos:
+            quote = text.find('"', pos)
+
+# selective loading
+ANY_KEY = '*'
+
+class _PathSelector(object):
+    """
+    Decides which keys to keep when only some key paths of a document are loaded.
+    A path is a tuple of keys from the root, ``ANY_KEY`` matches any key at its level.
+    A path that ends at a block keeps the whole block.
+
+    Blocks that cannot contain a requested path are skipped (``skip_depth``), and ``done``
+    is set as soon as no requested path can match anything further in the document: a path
+    without wildcards once its value was read, a path with a wildcard once the block
+    before the first wildcard was closed.
+    """
+    def __init__(self, paths):
+        self.paths = []
+        for path in paths:
+            path = tuple(path)
+            if not path or not all(isinstance(key, string_type) for key in path):
+                raise ValueError("Expected key paths to be non-empty tuples of str, got %r" % (path,))
+            self.paths.append(path)
+        self.wanted = [self.paths]  # paths relative to the open blocks, None = everything
+        self.keys = []              # keys of the open blocks that are kept
+        self.skip_depth = 0         # number of open blocks that are skipped
+        self._pending = set(path[:path.index(ANY_KEY)] if ANY_KEY in path else path for path in self.paths)
+        # a path starting with a wildcard can match until the end of the document
+        self.done = False
+        self._can_finish = () not in self._pending
+
+    def _child(self, key):
+        wanted = self.wanted[-1]
+        if wanted is None:
+            return None
+        child = [path[1:] for path in wanted if path[0] == key or path[0] == ANY_KEY]
+        if () in child:
+            return None
+        return child or False
+
+    def _complete(self, path):
+        if path in self._pending:
+            self._pending.discard(path)
+            if not self._pending and self._can_finish:
+                self.done = True
+
+    def enter(self, key):
+        """
+        A block starts. Returns False if the block is skipped.
+        """
+        if self.skip_depth:
+            self.skip_depth += 1
+            return False
+        child = self._child(key)
+        if child is False:
+            self.skip_depth = 1
+            return False
+        self.wanted.append(child)
+        self.keys.append(key)
+        return True
+
+    def leave(self):
+        """
+        A block ends. Returns False if the block was skipped.
+        """
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return False
+        self._complete(tuple(self.keys))
+        self.keys.pop()
+        self.wanted.pop()
+        return True
+
+    def wants(self, key):
+        """Whether to keep a value."""
+        if self.skip_depth:
+            return False
+        wanted = self.wanted[-1]
+        if wanted is not None:
+            if not any(len(path) == 1 and (path[0] == key or path[0] == ANY_KEY) for path in wanted):
+                return False
+            self._complete(tuple(self.keys) + (key,))
+        return True
+
+# events
+ENTER_SECTION = 'enter_section'
+KEY_VALUE = 'key_value'
+EXIT_SECTION = 'exit_section'
+
+def _build(events, mapper, merge_duplicate_keys, selector=None, replace_values=True):
+    """
+    Build the mapping from ``(event, key, value)`` tuples (``key`` is None for ``EXIT_SECTION``).
+    With a ``selector`` only the wanted keys are kept and building stops once it is done.
+    ``replace_values`` replaces a value by a section with the same key when merging
+    (the binary format has never done that).
+    """
+    stack = [mapper()]
+
+    if selector is None:
+        for event, key, value in events:
+            if event is KEY_VALUE:
+                stack[-1][key] = value
+            elif event is ENTER_SECTION:
+                if merge_duplicate_keys and key in stack[-1]:
+                    _m = stack[-1][key]
+                    # we've descended a level deeper, if value is str, we have to overwrite it to mapper
+                    if replace_values and not isinstance(_m, mapper):
+                        _m = stack[-1][key] = mapper()
+                else:
+                    _m = mapper()
+                    stack[-1][key] = _m
+                stack.append(_m)
+            else:
+                stack.pop()
+        return stack[0]
+
+    for event, key, value in events:
+        if event is KEY_VALUE:
+            if selector.wants(key):
+                stack[-1][key] = value
+        elif event is ENTER_SECTION:
+            if not selector.enter(key):
+                continue
+            if merge_duplicate_keys and key in stack[-1]:
+                _m = stack[-1][key]
+                if replace_values and not isinstance(_m, mapper):
+                    _m = stack[-1][key] = mapper()
+            else:
+                _m = mapper()
+                stack[-1][key] = _m
+            stack.append(_m)
+        elif selector.leave():
+            stack.pop()
+        if selector.done:
+            break
+    return stack[0]
+
+def _with_paths(events):
+    """
+    Public form of the events: ``(ENTER_SECTION, path, None)``, ``(KEY_VALUE, path, value)``
+    and ``(EXIT_SECTION, path, None)``, where ``path`` is the tuple of keys from the root.
+    """
+    path = ()
+    for event, key, value in events:
+        if event is KEY_VALUE:
+            yield event, path + (key,), value
+        elif event is ENTER_SECTION:
+            path = path + (key,)
+            yield event, path, None
+        else:
+            yield event, path, None
+            path = path[:-1]
+
 # parsing and dumping for KV1
-def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
+def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True, paths=None):
     """
     Deserialize ``s`` (a ``str`` or ``unicode`` instance containing a VDF)
     to a Python object.
@@ -77,22 +270,70 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``paths`` loads only the given key paths, e.g. ``[("AppState", "installdir")]`` or
+    ``[("libraryfolders", ANY_KEY, "path")]``. Other blocks and values are skipped, and
+    parsing stops as soon as all paths were read, so the rest of the document is not
+    validated and later duplicates of those keys are ignored.
     """
     if not issubclass(mapper, Mapping):
         raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
     if not hasattr(fp, 'readline'):
         raise TypeError("Expected fp to be a file-like object supporting line iteration")
 
-    stack = [mapper()]
+    selector = _PathSelector(paths) if paths is not None else None
+    return _build(_iter_text_events(fp, escaped), mapper, merge_duplicate_keys, selector)
+
+def iter_events(fp, escaped=True):
+    """
+    Iterate over the VDF in ``fp`` (a file-like object supporting line iteration)
+    without building it, one line at a time. Yields
+
+    - ``(ENTER_SECTION, path, None)`` when a section starts,
+    - ``(KEY_VALUE, path, value)`` for every key with a string value,
+    - ``(EXIT_SECTION, path, None)`` when a section ends,
+
+    where ``path`` is the tuple of keys from the root to the section or value.
+    Duplicate keys are reported as they appear. Errors are raised as ``SyntaxError``
+    like in ``parse``, when the iteration reaches them.
+    """
+    if not hasattr(fp, 'readline'):
+        raise TypeError("Expected fp to be a file-like object supporting line iteration")
+
+    return _with_paths(_iter_text_events(fp, escaped))
+
+def _iter_text_events(fp, escaped=True):
+    """
+    Tokenize a text VDF into ``(event, key, value)`` tuples, see ``_build``.
+    """
+    depth = 0
     expect_bracket = False
 
-    re_keyvalue = re.compile(r'^("(?P<qkey>(?:\\.|[^\\"])*)"|(?P<key>#?[a-z0-9\-\_\\\?$%<>]+))'
-                             r'([ \t]*('
-                             r'"(?P<qval>(?:\\.|[^\\"])*)(?P<vq_end>")?'
-                             r'|(?P<val>(?:(?<!/)/(?!/)|[a-z0-9\-\_\\\?\*\.$<> ])+)'
-                             r'|(?P<sblock>{[ \t]*)(?P<eblock>})?'
-                             r'))?',
-                             flags=re.I)
+    def read_quoted(line, pos, message):
+        """
+        Scan a quoted string starting at ``pos`` in ``line``, appending the following lines
+        until it is closed. Returns the (joined) line and the index of the closing quote.
+        """
+        index, state = _scan_quoted(line, pos)
+        if state == _QUOTE_CLOSED:
+            return line, index
+        parts = [line]
+        while state != _QUOTE_CLOSED:
+            try:
+                more = next(fp)
+            except StopIteration:
+                raise SyntaxError(message, (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, ''.join(parts)))
+            if state == _QUOTE_OPEN:
+                if index < len(parts[-1]):
+                    # a backslash at the very end of the line, escaping the first character of the next one
+                    more = parts[-1][index:] + more
+                    parts[-1] = parts[-1][:index]
+                parts.append(more)
+                index, state = _scan_quoted(more, 0)
+            else:
+                parts.append(more)
+        offset = sum(len(part) for part in parts[:-1])
+        return ''.join(parts), offset + index
 
     for lineno, line in enumerate(fp, 1):
         if lineno == 1:
@@ -115,77 +356,76 @@ def parse(fp, mapper=dict, merge_duplicate_keys=True, escaped=True):
 
         # one level back
         if line[0] == "}":
-            if len(stack) > 1:
-                stack.pop()
+            if depth:
+                depth -= 1
+                yield EXIT_SECTION, None, None
                 continue
 
             raise SyntaxError("vdf.parse: one too many closing parenthasis",
                               (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
 
-        # parse keyvalue pairs
-        while True:
-            match = re_keyvalue.match(line)
-
-            if not match:
-                try:
-                    line += next(fp)
-                    continue
-                except StopIteration:
-                    raise SyntaxError("vdf.parse: unexpected EOF (open key quote?)",
-                                      (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
-
-            key = match.group('key') if match.group('qkey') is None else match.group('qkey')
-            val = match.group('qval')
-            if val is None:
-                val = match.group('val')
-                if val is not None:
-                    val = val.rstrip()
-                    if val == "":
-                        val = None
-
-            if escaped:
-                key = _unescape(key)
-
-            # we have a key with value in parenthesis, so we make a new dict obj (level deeper)
-            if val is None:
-                if merge_duplicate_keys and key in stack[-1]:
-                    _m = stack[-1][key]
-                    # we've descended a level deeper, if value is str, we have to overwrite it to mapper
-                    if not isinstance(_m, mapper):
-                        _m = stack[-1][key] = mapper()
-                else:
-                    _m = mapper()
-                    stack[-1][key] = _m
-
-                if match.group('eblock') is None:
-                    # only expect a bracket if it's not already closed or on the same line
-                    stack.append(_m)
-                    if match.group('sblock') is None:
-                        expect_bracket = True
-
-            # we've matched a simple keyvalue pair, map it to the last dict obj in the stack
+        # parse keyvalue pairs: "key" or key, optionally followed by "value", value, { or {}
+        if line[0] == '"':
+            line, end = read_quoted(line, 1, "vdf.parse: unexpected EOF (open key quote?)")
+            key = line[1:end]
+            pos = end + 1
+        else:
+            pos = 1 if line[0] == '#' else 0
+            while pos < len(line) and line[pos] in _KEY_CHARS:
+                pos += 1
+            if pos == 0 or line[pos - 1] == '#':
+                # not a key, the same as an open key quote
+                parts = [line]
+                parts.extend(fp)
+                raise SyntaxError("vdf.parse: unexpected EOF (open key quote?)",
+                                  (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, ''.join(parts)))
+            key = line[:pos]
+
+        while pos < len(line) and line[pos] in ' \t':
+            pos += 1
+
+        val = None
+        block_start = block_end = False
+        if pos < len(line):
+            char = line[pos]
+            if char == '"':
+                line, end = read_quoted(line, pos + 1, "vdf.parse: unexpected EOF (open quote for value?)")
+                val = line[pos + 1:end]
+            elif char == '{':
+                block_start = True
+                pos += 1
+                while pos < len(line) and line[pos] in ' \t':
+                    pos += 1
+                block_end = pos < len(line) and line[pos] == '}'
             else:
-                # if the value is line consume one more line and try to match again,
-                # until we get the KeyValue pair
-                if match.group('vq_end') is None and match.group('qval') is not None:
-                    try:
-                        line += next(fp)
-                        continue
-                    except StopIteration:
-                        raise SyntaxError("vdf.parse: unexpected EOF (open quote for value?)",
-                                          (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
-
-                stack[-1][key] = _unescape(val) if escaped else val
-
-            # exit the loop
-            break
+                end = pos
+                while end < len(line) and (line[end] in _VALUE_CHARS or (line[end] == '/' and line[end + 1:end + 2] != '/')):
+                    end += 1
+                val = line[pos:end].rstrip() or None
+
+        if escaped:
+            key = _unescape(key)
+
+        # we have a key with value in parenthesis, so we have a section (level deeper)
+        if val is None:
+            if block_end:
+                yield ENTER_SECTION, key, None
+                yield EXIT_SECTION, None, None
+            else:
+                # only expect a bracket if it's not already closed or on the same line
+                depth += 1
+                if not block_start:
+                    expect_bracket = True
+                yield ENTER_SECTION, key, None
+
+        # we've matched a simple keyvalue pair
+        else:
+            yield KEY_VALUE, key, _unescape(val) if escaped else val
 
-    if len(stack) != 1:
+    if depth:
         raise SyntaxError("vdf.parse: unclosed parenthasis or quotes (EOF)",
                            (getattr(fp, 'name', '<%s>' % fp.__class__.__name__), lineno, 0, line))
 
-    return stack.pop()
-
 
 def loads(s, **kwargs):
     """
@@ -222,28 +462,41 @@ def dumps(obj, pretty=False, escaped=True):
     if not isinstance(escaped, bool):
         raise TypeError("Expected escaped to be of type bool")
 
-    return ''.join(_dump_gen(obj, pretty, escaped))
+    buf = unicodeIO()
+    _dump_text(obj, buf.write, pretty, escaped)
+    return buf.getvalue()
 
 
 def dump(obj, fp, pretty=False, escaped=True):
     """
     Serialize ``obj`` as a VDF formatted stream to ``fp`` (a
-    ``.write()``-supporting file-like object).
+    ``.write()``-supporting file-like object, or a file descriptor
+    the VDF is written to encoded as UTF-8).
+    The whole VDF is serialized before anything is written.
     """
     if not isinstance(obj, Mapping):
         raise TypeError("Expected data to be an instance of``dict``")
-    if not hasattr(fp, 'write'):
+    if not hasattr(fp, 'write') and not isinstance(fp, int_type):
         raise TypeError("Expected fp to have write() method")
     if not isinstance(pretty, bool):
         raise TypeError("Expected pretty to be of type bool")
     if not isinstance(escaped, bool):
         raise TypeError("Expected escaped to be of type bool")
 
-    for chunk in _dump_gen(obj, pretty, escaped):
-        fp.write(chunk)
+    text = dumps(obj, pretty, escaped)
+    if isinstance(fp, int_type):
+        _write_fd(fp, text.encode('utf-8'))
+    else:
+        fp.write(text)
+
 
+def _write_fd(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
 
-def _dump_gen(data, pretty=False, escaped=True, level=0):
+
+def _dump_text(data, write, pretty=False, escaped=True, level=0):
     indent = "\t"
     line_indent = ""
 
@@ -255,15 +508,14 @@ def _dump_gen(data, pretty=False, escaped=True, level=0):
             key = _escape(key)
 
         if isinstance(value, Mapping):
-            yield '%s"%s"\n%s{\n' % (line_indent, key, line_indent)
-            for chunk in _dump_gen(value, pretty, escaped, level+1):
-                yield chunk
-            yield "%s}\n" % line_indent
+            write('%s"%s"\n%s{\n' % (line_indent, key, line_indent))
+            _dump_text(value, write, pretty, escaped, level+1)
+            write("%s}\n" % line_indent)
         else:
             if escaped and isinstance(value, string_type):
                 value = _escape(value)
 
-            yield '%s"%s" "%s"\n' % (line_indent, key, value)
+            write('%s"%s" "%s"\n' % (line_indent, key, value))
 
 
 # binary VDF
@@ -295,10 +547,20 @@ BIN_END         = b'\x08'
 BIN_INT64       = b'\x0A'
 BIN_END_ALT     = b'\x0B'
 
-def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=True):
+_BINARY_BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# binary_load reads streams it cannot memory map in chunks, starting with this size and doubling
+_READ_CHUNK_SIZE = 64 * 1024
+
+_INT32 = struct.Struct('<i')
+_UINT64 = struct.Struct('<Q')
+_INT64 = struct.Struct('<q')
+_FLOAT32 = struct.Struct('<f')
+
+def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=True, paths=None):
     """
     Deserialize ``b`` (``bytes`` containing a VDF in "binary form")
-    to a Python object.
+    to a Python object. ``bytearray``, ``memoryview`` and ``mmap`` are accepted as well.
 
     ``mapper`` specifies the Python object used after deserializetion. ``dict` is
     used by default. Alternatively, ``collections.OrderedDict`` can be used if you
@@ -307,16 +569,33 @@ def binary_loads(b, mapper=dict, merge_duplicate_keys=True, alt_format=False, ra
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``paths`` loads only the given key paths, see ``parse``.
     """
-    if not isinstance(b, bytes):
+    if not isinstance(b, _BINARY_BUFFER_TYPES):
         raise TypeError("Expected s to be bytes, got %s" % type(b))
+    if not issubclass(mapper, Mapping):
+        raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
 
-    return binary_load(BytesIO(b), mapper, merge_duplicate_keys, alt_format, raise_on_remaining)
+    if isinstance(b, memoryview):
+        b = _byte_view(b)
 
-def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=False):
+    selector = _PathSelector(paths) if paths is not None else None
+    cursor = [0]
+    result = _build(_iter_binary_events(b, cursor, alt_format), mapper, merge_duplicate_keys, selector,
+                    replace_values=False)
+    if raise_on_remaining and cursor[0] < len(b) and not (selector is not None and selector.done):
+        raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (cursor[0] - 1))
+    return result
+
+def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, raise_on_remaining=False, paths=None):
     """
     Deserialize ``fp`` (a ``.read()``-supporting file-like object containing
-    binary VDF) to a Python object.
+    binary VDF, or a path to such a file) to a Python object.
+
+    A file-like object is decoded from its current position and left positioned right after
+    the binary VDF, so several VDFs can be read one after another. A file is memory mapped,
+    other streams are read in growing chunks until the end of the VDF. A path is memory mapped as well.
 
     ``mapper`` specifies the Python object used after deserializetion. ``dict` is
     used by default. Alternatively, ``collections.OrderedDict`` can be used if you
@@ -325,131 +604,293 @@ def binary_load(fp, mapper=dict, merge_duplicate_keys=True, alt_format=False, ra
     ``merge_duplicate_keys`` when ``True`` will merge multiple KeyValue lists with the
     same key into one instead of overwriting. You can se this to ``False`` if you are
     using ``VDFDict`` and need to preserve the duplicates.
+
+    ``paths`` loads only the given key paths, see ``parse``. A file-like object is then
+    left where decoding stopped.
     """
+    if isinstance(fp, (string_type, os.PathLike)):
+        with _MappedFile(fp) as data:
+            return binary_loads(data, mapper, merge_duplicate_keys, alt_format, raise_on_remaining, paths)
+
     if not hasattr(fp, 'read') or not hasattr(fp, 'tell') or not hasattr(fp, 'seek'):
         raise TypeError("Expected fp to be a file-like object with tell()/seek() and read() returning bytes")
     if not issubclass(mapper, Mapping):
         raise TypeError("Expected mapper to be subclass of dict, got %s" % type(mapper))
 
-    # helpers
-    int32 = struct.Struct('<i')
-    uint64 = struct.Struct('<Q')
-    int64 = struct.Struct('<q')
-    float32 = struct.Struct('<f')
-
-    def read_string(fp, wide=False):
-        buf, end = b'', -1
-        offset = fp.tell()
-
-        # locate string end
-        while end == -1:
-            chunk = fp.read(64)
-
-            if chunk == b'':
-                raise SyntaxError("Unterminated cstring (offset: %d)" % offset)
-
-            buf += chunk
-            end = buf.find(b'\x00\x00' if wide else b'\x00')
+    start = fp.tell()
+    data = _map_stream(fp, start)
+    if data is not None:
+        with data:
+            # offsets in the mapping are file offsets, decoding starts at the current position
+            selector = _PathSelector(paths) if paths is not None else None
+            cursor = [start]
+            try:
+                result = _build(_iter_binary_events(data, cursor, alt_format), mapper, merge_duplicate_keys, selector,
+                                replace_values=False)
+            finally:
+                fp.seek(cursor[0])
+            if raise_on_remaining and cursor[0] < len(data) and not (selector is not None and selector.done):
+                raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (cursor[0] - 1))
+        return result
 
-        if wide:
-            end += end % 2
+    # read in growing chunks while decoding, so only about the VDF itself is read
+    data = bytearray()
+    chunk_size = [_READ_CHUNK_SIZE]
 
-        # rewind fp
-        fp.seek(end - len(buf) + (2 if wide else 1), 1)
+    def refill():
+        data.extend(fp.read(chunk_size[0]))
+        chunk_size[0] *= 2
+        return len(data)
 
-        # decode string
-        result = buf[:end]
+    selector = _PathSelector(paths) if paths is not None else None
+    cursor = [0]
+    try:
+        result = _build(_iter_binary_events(data, cursor, alt_format, base=start, refill=refill), mapper,
+                        merge_duplicate_keys, selector, replace_values=False)
+    finally:
+        fp.seek(start + cursor[0])
+    if raise_on_remaining and not (selector is not None and selector.done):
+        # the VDF may end exactly where the last chunk did, one more byte tells if anything follows
+        if cursor[0] < len(data) or fp.read(1):
+            fp.seek(start + cursor[0])
+            raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (start + cursor[0] - 1))
+    return result
+
+def binary_iter_events(b, alt_format=False):
+    """
+    Iterate over a binary VDF without building it, see ``iter_events``.
+    ``b`` is ``bytes``, ``bytearray``, ``memoryview``, ``mmap`` or a path to a file, which is
+    memory mapped for as long as the iteration runs. Values have the types ``binary_loads`` gives them.
+    Iteration ends at the end marker of the root, any remaining data is ignored.
+    """
+    if isinstance(b, (string_type, os.PathLike)):
+        return _iter_binary_file_events(b, alt_format)
+    if not isinstance(b, _BINARY_BUFFER_TYPES):
+        raise TypeError("Expected b to be bytes or a path, got %s" % type(b))
+    if isinstance(b, memoryview):
+        b = _byte_view(b)
 
-        if wide:
-            result = result.decode('utf-16')
-        elif bytes is not str:
-            result = result.decode('utf-8', 'replace')
-        else:
-            try:
-                result.decode('ascii')
-            except:
-                result = result.decode('utf-8', 'replace')
+    return _with_paths(_iter_binary_events(b, [0], alt_format))
 
-        return result
+def _iter_binary_file_events(path, alt_format):
+    with _MappedFile(path) as data:
+        for event in _with_paths(_iter_binary_events(data, [0], alt_format)):
+            yield event
 
-    stack = [mapper()]
-    CURRENT_BIN_END = BIN_END if not alt_format else BIN_END_ALT
+def _map_stream(fp, start):
+    """
+    Read-only ``mmap`` of the whole file behind ``fp``, or ``None`` if ``fp`` is not a plain file
+    (``BytesIO``, a pipe, a decompressing stream whose ``fileno()`` is the compressed file...)
+    or has nothing left after ``start``.
+    """
+    if not isinstance(fp, (io.FileIO, io.BufferedReader, io.BufferedRandom)):
+        return None
+    try:
+        fileno = fp.fileno()
+        if fp.writable():
+            fp.flush()  # the mapping only sees what was written to the file
+        if os.fstat(fileno).st_size <= start:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+def _byte_view(view):
+    """
+    ``view`` in a shape ``_iter_binary_events`` decodes without copying: the object it views
+    if that is all of a ``bytes``, ``bytearray`` or ``mmap``, otherwise a flat view of unsigned bytes.
+    """
+    if isinstance(view.obj, (bytes, bytearray, mmap.mmap)) and view.c_contiguous and view.nbytes == len(view.obj):
+        return view.obj
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
 
-    for t in iter(lambda: fp.read(1), b''):
-        if t == CURRENT_BIN_END:
-            if len(stack) > 1:
-                stack.pop()
+def _view_finder(view):
+    """
+    ``find(sub, start)`` for a ``memoryview``, which has no ``find()``. Windows after ``start``
+    of doubling size are searched, so only about twice the bytes up to the match are copied.
+    """
+    size = len(view)
+
+    def find(sub, start):
+        window = 64
+        while start < size:
+            end = min(start + window, size)
+            found = view[start:end].tobytes().find(sub)
+            if found != -1:
+                return start + found
+            if end == size:
+                break
+            start = end - len(sub) + 1     # sub may straddle the end of the window
+            window *= 2
+        return -1
+    return find
+
+class _MappedFile(object):
+    """Context manager giving the content of a file as read-only ``mmap`` (``b''`` if the file is empty)."""
+    def __init__(self, path):
+        self.path = path
+        self._data = None
+
+    def __enter__(self):
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._data
+
+    def __exit__(self, *exc_info):
+        if self._data is not None:
+            self._data.close()
+
+def _iter_binary_events(data, cursor, alt_format, base=0, refill=None):
+    """
+    Decode binary VDF from ``data`` (``bytes``, ``bytearray``, ``mmap`` or a byte ``memoryview``) into ``(event, key, value)``
+    tuples, see ``_build``, starting at ``cursor[0]``.
+    ``cursor[0]`` is kept at the offset after the last event, when the iteration ends it is right after
+    the end marker of the root (or past the end of ``data`` if the data ended without one).
+    ``base`` is the file offset of ``data``, for error messages.
+    ``refill`` is called when ``data`` (a ``bytearray`` then) ends before the VDF does, to append more of
+    the stream to it. It returns the new length of ``data``, unchanged at the end of the stream.
+    """
+    find = _view_finder(data) if isinstance(data, memoryview) else data.find
+    size = len(data)
+    pos = cursor[0]
+
+    def unterminated(pos):
+        return SyntaxError("Unterminated cstring (offset: %d)" % (base + pos))
+
+    def filled(needed):
+        """Whether ``data`` holds ``needed`` bytes, after refilling it if possible."""
+        length = len(data)
+        while length < needed:
+            if refill is None or refill() == length:
+                return False
+            length = len(data)
+        return True
+
+    def find_more(sub, pos):
+        """``find`` for a terminator that is not in ``data``, which is refilled until it is."""
+        searched = len(data)
+        while filled(searched + 1):
+            end = find(sub, max(pos, searched - len(sub) + 1))
+            if end != -1:
+                return end
+            searched = len(data)
+        raise unterminated(pos)
+
+    def unpack(unpacker, pos):
+        if pos + unpacker.size > len(data) and not filled(pos + unpacker.size):
+            raise struct.error("unpack requires a buffer of %d bytes" % unpacker.size)
+        return unpacker.unpack_from(data, pos)[0]
+
+    current_bin_end = ord(BIN_END if not alt_format else BIN_END_ALT)
+    depth = 0
+
+    while True:
+        if pos >= size:
+            if not filled(pos + 1):
+                break
+            size = len(data)
+        t = data[pos]
+        pos += 1
+        if t == current_bin_end:
+            if depth:
+                depth -= 1
+                cursor[0] = pos
+                yield EXIT_SECTION, None, None
                 continue
             break
 
-        key = read_string(fp)
-
-        if t == BIN_NONE:
-            if merge_duplicate_keys and key in stack[-1]:
-                _m = stack[-1][key]
-            else:
-                _m = mapper()
-                stack[-1][key] = _m
-            stack.append(_m)
-        elif t == BIN_STRING:
-            stack[-1][key] = read_string(fp)
-        elif t == BIN_WIDESTRING:
-            stack[-1][key] = read_string(fp, wide=True)
-        elif t in (BIN_INT32, BIN_POINTER, BIN_COLOR):
-            val = int32.unpack(fp.read(int32.size))[0]
-
-            if t == BIN_POINTER:
-                val = POINTER(val)
-            elif t == BIN_COLOR:
-                val = COLOR(val)
-
-            stack[-1][key] = val
-        elif t == BIN_UINT64:
-            stack[-1][key] = UINT_64(uint64.unpack(fp.read(int64.size))[0])
-        elif t == BIN_INT64:
-            stack[-1][key] = INT_64(int64.unpack(fp.read(int64.size))[0])
-        elif t == BIN_FLOAT32:
-            stack[-1][key] = float32.unpack(fp.read(float32.size))[0]
+        # strings are inlined, this loop runs for every key
+        end = find(b'\x00', pos)
+        if end == -1:
+            end = find_more(b'\x00', pos)
+        key = str(data[pos:end], 'utf-8', 'replace')
+        pos = end + 1
+
+        if t == 0x01:       # BIN_STRING
+            end = find(b'\x00', pos)
+            if end == -1:
+                end = find_more(b'\x00', pos)
+            value = str(data[pos:end], 'utf-8', 'replace')
+            pos = end + 1
+        elif t == 0x00:     # BIN_NONE
+            depth += 1
+            cursor[0] = pos
+            yield ENTER_SECTION, key, None
+            continue
+        elif t == 0x05:     # BIN_WIDESTRING
+            end = find(b'\x00\x00', pos)
+            if end == -1:
+                end = find_more(b'\x00\x00', pos)
+            end += (end - pos) % 2
+            if end + 2 > len(data):
+                filled(end + 2)
+            value = str(data[pos:end], 'utf-16')
+            pos = end + 2
+        elif t == 0x02:     # BIN_INT32
+            value = unpack(_INT32, pos)
+            pos += 4
+        elif t == 0x04:     # BIN_POINTER
+            value = POINTER(unpack(_INT32, pos))
+            pos += 4
+        elif t == 0x06:     # BIN_COLOR
+            value = COLOR(unpack(_INT32, pos))
+            pos += 4
+        elif t == 0x07:     # BIN_UINT64
+            value = UINT_64(unpack(_UINT64, pos))
+            pos += 8
+        elif t == 0x0A:     # BIN_INT64
+            value = INT_64(unpack(_INT64, pos))
+            pos += 8
+        elif t == 0x03:     # BIN_FLOAT32
+            value = unpack(_FLOAT32, pos)
+            pos += 4
         else:
-            raise SyntaxError("Unknown data type at offset %d: %s" % (fp.tell() - 1, repr(t)))
+            raise SyntaxError("Unknown data type at offset %d: %s" % (base + pos - 1, repr(bytes((t,)))))
 
-    if len(stack) != 1:
-        raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
-    if raise_on_remaining and fp.read(1) != b'':
-        fp.seek(-1, 1)
-        raise SyntaxError("Binary VDF ended at offset %d, but there is more data remaining" % (fp.tell() - 1))
+        cursor[0] = pos
+        yield KEY_VALUE, key, value
 
-    return stack.pop()
+    cursor[0] = pos
+    if depth:
+        raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
 
 def binary_dumps(obj, alt_format=False):
     """
     Serialize ``obj`` to a binary VDF formatted ``bytes``.
     """
-    buf = BytesIO()
-    binary_dump(obj, buf, alt_format)
-    return buf.getvalue()
+    if not isinstance(obj, Mapping):
+        raise TypeError("Expected obj to be type of Mapping")
+
+    buf = bytearray()
+    _binary_dump(obj, buf, alt_format=alt_format)
+    return bytes(buf)
 
 def binary_dump(obj, fp, alt_format=False):
     """
     Serialize ``obj`` to a binary VDF formatted ``bytes`` and write it to ``fp`` filelike object
+    or file descriptor. The whole VDF is serialized before anything is written.
     """
     if not isinstance(obj, Mapping):
         raise TypeError("Expected obj to be type of Mapping")
-    if not hasattr(fp, 'write'):
+    if not hasattr(fp, 'write') and not isinstance(fp, int_type):
         raise TypeError("Expected fp to have write() method")
 
-    for chunk in _binary_dump_gen(obj, alt_format=alt_format):
-        fp.write(chunk)
+    buf = bytearray()
+    _binary_dump(obj, buf, alt_format=alt_format)
+    if isinstance(fp, int_type):
+        _write_fd(fp, buf)
+    else:
+        fp.write(buf)
 
-def _binary_dump_gen(obj, level=0, alt_format=False):
+def _binary_dump(obj, buf, level=0, alt_format=False):
+    """Append ``obj`` serialized as binary VDF to the ``bytearray`` ``buf``."""
     if level == 0 and len(obj) == 0:
         return
 
-    int32 = struct.Struct('<i')
-    uint64 = struct.Struct('<Q')
-    int64 = struct.Struct('<q')
-    float32 = struct.Struct('<f')
-
     for key, value in obj.items():
         if isinstance(key, string_type):
             key = key.encode('utf-8')
@@ -457,36 +898,31 @@ def _binary_dump_gen(obj, level=0, alt_format=False):
             raise TypeError("dict keys must be of type str, got %s" % type(key))
 
         if isinstance(value, Mapping):
-            yield BIN_NONE + key + BIN_NONE
-            for chunk in _binary_dump_gen(value, level+1, alt_format=alt_format):
-                yield chunk
+            buf += BIN_NONE + key + BIN_NONE
+            _binary_dump(value, buf, level+1, alt_format=alt_format)
         elif isinstance(value, UINT_64):
-            yield BIN_UINT64 + key + BIN_NONE + uint64.pack(value)
+            buf += BIN_UINT64 + key + BIN_NONE + _UINT64.pack(value)
         elif isinstance(value, INT_64):
-            yield BIN_INT64 + key + BIN_NONE + int64.pack(value)
+            buf += BIN_INT64 + key + BIN_NONE + _INT64.pack(value)
         elif isinstance(value, string_type):
             try:
-                value = value.encode('utf-8') + BIN_NONE
-                yield BIN_STRING
+                buf += BIN_STRING + key + BIN_NONE + value.encode('utf-8') + BIN_NONE
             except:
-                value = value.encode('utf-16') + BIN_NONE*2
-                yield BIN_WIDESTRING
-            yield key + BIN_NONE + value
+                buf += BIN_WIDESTRING + key + BIN_NONE + value.encode('utf-16') + BIN_NONE*2
         elif isinstance(value, float):
-            yield BIN_FLOAT32 + key + BIN_NONE + float32.pack(value)
+            buf += BIN_FLOAT32 + key + BIN_NONE + _FLOAT32.pack(value)
         elif isinstance(value, (COLOR, POINTER, int, int_type)):
             if isinstance(value, COLOR):
-                yield BIN_COLOR
+                value_type = BIN_COLOR
             elif isinstance(value, POINTER):
-                yield BIN_POINTER
+                value_type = BIN_POINTER
             else:
-                yield BIN_INT32
-            yield key + BIN_NONE
-            yield int32.pack(value)
+                value_type = BIN_INT32
+            buf += value_type + key + BIN_NONE + _INT32.pack(value)
         else:
             raise TypeError("Unsupported type: %s" % type(value))
 
-    yield BIN_END if not alt_format else BIN_END_ALT
+    buf += BIN_END if not alt_format else BIN_END_ALT
 
 
 def vbkv_loads(s, mapper=dict, merge_duplicate_keys=True):
@@ -511,11 +947,26 @@ def vbkv_loads(s, mapper=dict, merge_duplicate_keys=True):
 
     return binary_loads(s[8:], mapper, merge_duplicate_keys, alt_format=True)
 
+def vbkv_iter_events(s):
+    """
+    Iterate over a VBKV (``bytes``) without building it, see ``iter_events``.
+    """
+    if s[:4] != b'VBKV':
+        raise ValueError("Invalid header")
+
+    checksum, = struct.unpack('<i', s[4:8])
+
+    if checksum != crc32(memoryview(s)[8:]):
+        raise ValueError("Invalid checksum")
+
+    # offsets in errors are relative to the binary VDF after the header, like in vbkv_loads
+    return _with_paths(_iter_binary_events(s, [8], True, base=-8))
+
 def vbkv_dumps(obj):
     """
     Serialize ``obj`` to a VBKV formatted ``bytes``.
     """
-    data =  b''.join(_binary_dump_gen(obj, alt_format=True))
+    data = binary_dumps(obj, alt_format=True)
     checksum = crc32(data)
 
     return b'VBKV' + struct.pack('<i', checksum) + data
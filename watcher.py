@@ -0,0 +1,211 @@
+import ctypes
+import ctypes.util
+import os
+import platform
+import struct
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+from manager import ModSnapshot
+
+
+MOD_PATTERN = "*.mod"
+
+# what happened to a watched path
+EVENT_ADDED = "added"
+EVENT_REMOVED = "removed"
+EVENT_MODIFIED = "modified"
+
+POLLING_INTERVAL = 5.0  # seconds between two stat snapshots of the PollingWatcher
+
+
+class WatchEvent:
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = Path(path)
+
+    def __repr__(self):
+        return f"WatchEvent('{self.kind}', '{self.path}')"
+
+    def __eq__(self, other):
+        return isinstance(other, WatchEvent) and (self.kind, self.path) == (other.kind, other.path)
+
+    def __hash__(self):
+        return hash((self.kind, self.path))
+
+
+def create_watcher(folders):
+    """
+    Create the best available watcher for the given mod folders.
+    inotify is used on Linux, every other system (or a failure to set up inotify) falls back to polling.
+    """
+    if platform.system() == "Linux":
+        try:
+            return InotifyWatcher(folders)
+        except OSError as e:
+            print(f"inotify is not available, falling back to polling: {e}")
+    return PollingWatcher(folders)
+
+
+class PollingWatcher:
+    """
+    Watches mod folders by comparing stat snapshots of the *.mod files.
+    No file is ever opened, a snapshot costs one stat per folder and file,
+    and it is taken at most once per `interval` seconds no matter how often poll() is called.
+    """
+    def __init__(self, folders, interval=POLLING_INTERVAL):
+        self.folders = [Path(folder) for folder in folders]
+        self.interval = interval
+        self._snapshot = ModSnapshot(self.folders, MOD_PATTERN)
+        self._last_poll = time.monotonic()
+
+    def poll(self) -> list[WatchEvent]:
+        """
+        Get changes since the previous poll. Never blocks.
+        """
+        now = time.monotonic()
+        if now - self._last_poll < self.interval:
+            return []
+        self._last_poll = now
+
+        snapshot = ModSnapshot(self.folders, MOD_PATTERN)
+        added, removed, modified = self._snapshot.changes(snapshot)
+        self._snapshot = snapshot
+        events = [WatchEvent(EVENT_ADDED, path) for path in added]
+        events += [WatchEvent(EVENT_REMOVED, path) for path in removed]
+        events += [WatchEvent(EVENT_MODIFIED, path) for path in modified]
+        return events
+
+    def close(self):
+        pass
+
+
+def _scandir(path):
+    try:
+        with os.scandir(path) as entries:
+            return list(entries)
+    except OSError:
+        return []
+
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    Watches mod folders with Linux inotify (through ctypes, no extra packages).
+    The mod folders and their direct subfolders are watched, same depth as Manager.find_all_mods scans.
+    The kernel queues the events, poll() only reads what is already there.
+    """
+    def __init__(self, folders):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+
+        self.folders = [Path(folder) for folder in folders]
+        self._watches: dict[int, tuple[Path, bool]] = {}  # watch descriptor -> (watched folder, is mod folder root)
+        for folder in self.folders:
+            self._add_watch(folder, is_root=True)
+            for entry in _scandir(folder):
+                if entry.is_dir():
+                    self._add_watch(Path(entry.path), is_root=False)
+
+    def poll(self) -> list[WatchEvent]:
+        """
+        Get changes since the previous poll. Never blocks.
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            events.extend(self._parse_events(data))
+        return events
+
+    def close(self):
+        if getattr(self, "_fd", -1) >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches.clear()
+
+    def __del__(self):
+        self.close()
+
+    def _add_watch(self, folder: Path, is_root):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            if is_root:
+                raise OSError(errno, f"inotify_add_watch failed for {folder}: {os.strerror(errno)}")
+            print(f"Cannot watch {folder}: {os.strerror(errno)}")
+            return
+        self._watches[wd] = (folder, is_root)
+
+    def _parse_events(self, data):
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # events were lost, report every folder as changed
+                events.extend(WatchEvent(EVENT_MODIFIED, folder) for folder in self.folders)
+                continue
+            if wd not in self._watches:
+                continue
+            folder, is_root = self._watches[wd]
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                events.append(WatchEvent(EVENT_REMOVED, folder))
+                continue
+
+            path = folder / name
+            if mask & IN_ISDIR:
+                if not is_root:
+                    continue    # deeper folders are not scanned for mods
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_watch(path, is_root=False)
+                    events.append(WatchEvent(EVENT_ADDED, path))
+                    # files created before the watch was in place would be missed otherwise
+                    events.extend(WatchEvent(EVENT_ADDED, entry.path) for entry in _scandir(path)
+                                  if fnmatch(entry.name, MOD_PATTERN))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append(WatchEvent(EVENT_REMOVED, path))
+                continue
+
+            if not fnmatch(name, MOD_PATTERN):
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                events.append(WatchEvent(EVENT_ADDED, path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(WatchEvent(EVENT_REMOVED, path))
+            elif mask & IN_CLOSE_WRITE:
+                events.append(WatchEvent(EVENT_MODIFIED, path))
+        return events